@@ -14,7 +14,10 @@ setup(
     install_requires=[
         "requests",  # Add other dependencies here
     ],
-    python_requires=">=3.6",
+    extras_require={
+        "msgpack": ["msgpack"],  # Compact binary responses
+    },
+    python_requires=">=3.7",
     entry_points={
         "console_scripts": [
             "slurm-job-tracker=slurm_job_tracker.main:main",
@@ -1,2 +1,12 @@
-from .tracker import SlurmJobTracker
-from .server import run_server
\ No newline at end of file
+__all__ = ['SlurmJobTracker', 'run_server']
+
+
+def __getattr__(name):
+    # Imported on first access, so `slurm-client` does not load the tracker and server
+    if name == 'SlurmJobTracker':
+        from .tracker import SlurmJobTracker
+        return SlurmJobTracker
+    if name == 'run_server':
+        from .server import run_server
+        return run_server
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,156 @@
+import logging
+import subprocess
+from collections import deque
+
+from .config import SACCT_BATCH_SIZE, SACCT_MAX_ATTEMPTS, SACCT_RECONCILED_IDS
+
+SACCT_FIELDS = ('JobID', 'State', 'ExitCode', 'Start',
+                'End', 'ElapsedRaw', 'MaxRSS')
+ACTIVE_STATES = ('PENDING', 'RUNNING', 'COMPLETING',
+                 'REQUEUED', 'RESIZING', 'SUSPENDED')
+RSS_UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+class SacctReconciler:
+    """
+    Enrich completed job records with accounting data from `sacct`.
+
+    Jobs that disappeared from squeue are queued with `add` and looked up in a single
+    batched `sacct` call per tick. Every job is queried until its accounting record
+    is complete; the final record is merged into the completed job and only the ids
+    of the last `reconciled_ids` reconciled jobs are remembered to skip them afterwards.
+
+    Attributes:
+        max_attempts (int): Ticks after which a job without a final sacct record is given up.
+        batch_size (int): Maximum number of job ids per sacct invocation.
+        reconciled (set): Ids of recently reconciled jobs.
+        pending (dict): Number of lookup attempts keyed by job id still to be reconciled.
+        available (bool): False once sacct turned out not to be installed.
+    """
+
+    def __init__(self, max_attempts=SACCT_MAX_ATTEMPTS, batch_size=SACCT_BATCH_SIZE,
+                 reconciled_ids=SACCT_RECONCILED_IDS):
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.reconciled = set()
+        self.reconciled_order = deque(maxlen=reconciled_ids)
+        self.pending = {}
+        self.available = True
+
+    def add(self, job_ids):
+        """Queue finished jobs for reconciliation."""
+        for job_id in job_ids:
+            if job_id not in self.reconciled:
+                self.pending.setdefault(job_id, 0)
+
+    def query(self, job_ids):
+        """Run sacct for `job_ids` and return the parsed records keyed by job id."""
+        records = {}
+        for i in range(0, len(job_ids), self.batch_size):
+            batch = job_ids[i:i + self.batch_size]
+            output = subprocess.check_output(
+                ["sacct", "-j", ",".join(batch), "--parsable2", "--noheader",
+                 f"--format={','.join(SACCT_FIELDS)}"]).decode("utf-8")
+            records.update(self.parse_sacct(output))
+        return records
+
+    @staticmethod
+    def parse_sacct(output):
+        """
+        Parse `sacct --parsable2 --noheader` output.
+
+        Job steps (``123.batch``, ``123.0``) are folded into their job: state, exit code
+        and times come from the job line, MaxRSS is the maximum over all steps.
+        """
+        records = {}
+        for line in output.strip().splitlines():
+            values = line.split('|')
+            if len(values) != len(SACCT_FIELDS):
+                continue
+            fields = dict(zip(SACCT_FIELDS, values))
+            job_id, _, step = fields['JobID'].partition('.')
+            record = records.setdefault(job_id, {'max_rss': None})
+
+            max_rss = SacctReconciler.parse_rss(fields['MaxRSS'])
+            if max_rss is not None:
+                record['max_rss'] = max(record['max_rss'] or 0, max_rss)
+            if step:
+                continue
+
+            record['state'] = fields['State'].split()[
+                0] if fields['State'] else None
+            record['exit_code'] = fields['ExitCode'] or None
+            record['start_time'] = SacctReconciler.parse_time(fields['Start'])
+            record['end_time'] = SacctReconciler.parse_time(fields['End'])
+            record['elapsed'] = int(fields['ElapsedRaw']) if fields['ElapsedRaw'].isdigit() else None
+        return records
+
+    @staticmethod
+    def parse_time(value):
+        """Convert a sacct timestamp to the tracker's format, None if unknown."""
+        if not value or value in ('Unknown', 'None'):
+            return None
+        return value.replace('T', ' ')
+
+    @staticmethod
+    def parse_rss(value):
+        """Convert a MaxRSS value such as ``1234K`` to bytes."""
+        if not value:
+            return None
+        try:
+            if value[-1] in RSS_UNITS:
+                return int(float(value[:-1]) * RSS_UNITS[value[-1]])
+            return int(value)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def is_final(record):
+        """Check whether a sacct record describes a job that has ended."""
+        return record.get('state') not in (None,) + ACTIVE_STATES and record.get('end_time') is not None
+
+    def reconcile(self, completed_jobs):
+        """
+        Look up all pending jobs with one batched sacct call and update `completed_jobs`.
+
+        Returns the ids of jobs whose records are now final, either because sacct
+        reported their end or because `max_attempts` lookups were exhausted.
+        """
+        if not self.pending:
+            return []
+
+        job_ids = list(self.pending)
+        records = {}
+        if self.available:
+            try:
+                records = self.query(job_ids)
+            except FileNotFoundError:
+                logging.warning(
+                    "sacct is not available, completed jobs will not be reconciled.")
+                self.available = False
+            except subprocess.CalledProcessError as e:
+                logging.error(f"Error retrieving accounting data: {e}")
+
+        finalized = []
+        for job_id in job_ids:
+            record = records.get(job_id)
+            self.pending[job_id] += 1
+            if record is not None and self.is_final(record):
+                if len(self.reconciled_order) == self.reconciled_order.maxlen:
+                    self.reconciled.discard(self.reconciled_order[0])
+                self.reconciled_order.append(job_id)
+                self.reconciled.add(job_id)
+                if job_id in completed_jobs:
+                    # Replaced rather than updated, the tracker's records are copy-on-write
+                    completed_jobs[job_id] = {
+                        **completed_jobs[job_id], **{key: value for key, value in record.items() if value is not None}}
+                logging.info(
+                    f"Job {job_id} reconciled: {record['state']} (exit code {record['exit_code']})")
+            elif self.available and self.pending[job_id] < self.max_attempts:
+                continue
+            else:
+                logging.warning(
+                    f"No final accounting record for job {job_id}, keeping tracked times.")
+            del self.pending[job_id]
+            finalized.append(job_id)
+        return finalized
@@ -1,26 +1,73 @@
 import argparse
-from slurm_job_tracker.client import SlurmJobTrackerClient
+import json
+
+from slurm_job_tracker.config import OUTPUT_TAIL_LINES
+
+
+def make_client(transport, socket_path, port=None):
+    """Create the client for `transport`, importing only the modules it needs."""
+    kwargs = {"socket_path": socket_path}
+    if port is not None:
+        kwargs.update(server_port=port, socket_path="")  # A replica only listens on TCP
+    if transport == "requests":
+        from slurm_job_tracker.client import SlurmJobTrackerClient
+        return SlurmJobTrackerClient(**kwargs)
+    from slurm_job_tracker.stdlib_client import StdlibSlurmJobTrackerClient
+    return StdlibSlurmJobTrackerClient(**kwargs)
+
 
 def main():
     parser = argparse.ArgumentParser(description="Slurm Job Tracker Client")
-    parser.add_argument("command", choices=["submit", "status", "queue", "info"], help="Command to execute")
+    parser.add_argument("command", choices=["submit", "status", "queue", "info", "stats", "tail", "submit-workflow",
+                                            "workflow", "node", "profile"],
+                        help="Command to execute")
+    parser.add_argument("target", nargs="?",
+                        help="Job ID (tail, status), workflow ID (workflow) or hostlist (node)")
     parser.add_argument("--working-dir", help="Working directory for task submission")
     parser.add_argument("--script-name", default="submit.sh", help="Submission script name (default: submit.sh)")
+    parser.add_argument("--idempotency-key",
+                        help="Key making repeated submissions of the same task safe (submit command)")
+    parser.add_argument("--max-resubmits", type=int,
+                        help="Resubmissions of the job if it ends in a failure state (submit command)")
+    parser.add_argument("--file", help="JSON file with the task list for the submit-workflow command")
+    parser.add_argument("--name", help="Workflow name for the submit-workflow command")
+    parser.add_argument("--nodes", help="Only show jobs on the nodes of this hostlist (status command)")
+    parser.add_argument("--state", help="Only show jobs in this squeue state, e.g. R or PD (status command)")
+    parser.add_argument("-n", "--lines", type=int, default=OUTPUT_TAIL_LINES,
+                        help=f"Number of output lines for the tail command (default: {OUTPUT_TAIL_LINES})")
+    parser.add_argument("-f", "--follow", action="store_true",
+                        help="Keep printing new output until the job ends (tail command)")
+    parser.add_argument("--duration", type=float, default=0,
+                        help="Seconds to sample the server threads for the profile command (default: 0, traces only)")
+    parser.add_argument("--socket",
+                        help="Unix domain socket of a local server (default: $SLURM_TRACKER_SOCKET)")
+    parser.add_argument("--port", type=int,
+                        help="Server port, e.g. of a read-only replica for status, queue and info")
+    parser.add_argument("--transport", choices=["stdlib", "requests"], default="stdlib",
+                        help="HTTP implementation; stdlib starts fastest (default: stdlib)")
     args = parser.parse_args()
 
-    client = SlurmJobTrackerClient()
+    client = make_client(args.transport, args.socket, args.port)
 
     if args.command == "submit":
         if not args.working_dir:
             print("Error: --working-dir is required for the submit command.")
             return
-        response = client.submit_task(args.working_dir, args.script_name)
+        response = client.submit_task(
+            args.working_dir, args.script_name, args.idempotency_key, args.max_resubmits)
         print("Submission Response:", response)
 
     elif args.command == "status":
-        response = client.get_status()
+        response = client.get_status(args.nodes, args.state, args.target)
         print("Current Status:", response)
 
+    elif args.command == "node":
+        if not args.target:
+            print("Error: a node name or hostlist is required for the node command.")
+            return
+        response = client.get_node(args.target)
+        print("Node:", response)
+
     elif args.command == "queue":
         response = client.get_queue()
         print("Queue:", response)
@@ -28,5 +75,43 @@ def main():
     elif args.command == "info":
         response = client.get_info()
         print("Info:", response)
+
+    elif args.command == "stats":
+        response = client.get_stats()
+        print("Stats:", response)
+
+    elif args.command == "submit-workflow":
+        if not args.file:
+            print("Error: --file is required for the submit-workflow command.")
+            return
+        with open(args.file) as f:
+            tasks = json.load(f)
+        response = client.submit_workflow(tasks, args.name)
+        print("Workflow Response:", response)
+
+    elif args.command == "workflow":
+        response = client.get_workflow(args.target)
+        print("Workflow:", response)
+
+    elif args.command == "profile":
+        response = client.get_profile(args.duration)
+        print("Profile:", json.dumps(response, indent=2) if response else response)
+
+    elif args.command == "tail":
+        if not args.target:
+            print("Error: a job ID is required for the tail command.")
+            return
+        if args.follow:
+            try:
+                for data in client.follow_output(args.target, args.lines):
+                    print(data, end="", flush=True)
+            except KeyboardInterrupt:
+                pass
+            return
+        response = client.tail_output(args.target, args.lines)
+        if response and response.get('status') == 'Output retrieved':
+            print(response['data'], end="")
+        else:
+            print("Output:", response)
         
     return  # Ensure the function properly exits
@@ -1,49 +1,212 @@
+import asyncio
+import codecs
 import json
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from .config import SECRET_TOKEN, SERVER_HOST, SERVER_PORT
+from .commands import CACHED_COMMANDS, ResponseCache, TrackerCommands
+from .config import (CLIENT_BACKOFF, CLIENT_MAX_CONCURRENCY, CLIENT_RETRIES, CLIENT_TIMEOUT, OUTPUT_TAIL_LINES,
+                     SERVER_HOST, SERVER_PORT, get_secret_token, get_socket_path)
+from .encoding import MSGPACK_CONTENT_TYPE, accepted_content_types, decode_response
+from .transport import UnixSocketAdapter
 
 
-class SlurmJobTrackerClient:
-    """Client to communicate with the Slurm Job Tracker server."""
+class SlurmJobTrackerClient(TrackerCommands):
+    """
+    Client to communicate with the Slurm Job Tracker server.
 
-    def __init__(self, server_host=SERVER_HOST, server_port=SERVER_PORT, secret_token=SECRET_TOKEN):
-        self.server_url = f"http://{server_host}:{server_port}"
-        self.headers = {'Content-Type': 'application/json'}
+    Commands are sent through a persistent `requests.Session`, so consecutive calls reuse
+    the same keep-alive connection. Failed connection attempts and 502/503/504 responses
+    are retried with exponential backoff.
+
+    If `socket_path` points to an existing Unix domain socket the client talks to the
+    server through it instead of TCP.
+
+    Responses are requested gzip compressed and msgpack encoded (when msgpack is
+    installed). The responses of the most recent read-only commands (except
+    `tail_output`) are cached together with their ETag in a small LRU cache, so an
+    unchanged result is answered by the server with a bodiless 304.
+
+    `secret_token` and `socket_path` default to SLURM_TRACKER_TOKEN and
+    SLURM_TRACKER_SOCKET. For a lighter client without requests, see
+    `slurm_job_tracker.stdlib_client.StdlibSlurmJobTrackerClient`.
+    """
+
+    def __init__(self, server_host=SERVER_HOST, server_port=SERVER_PORT, secret_token=None,
+                 timeout=CLIENT_TIMEOUT, retries=CLIENT_RETRIES, backoff_factor=CLIENT_BACKOFF,
+                 pool_size=CLIENT_MAX_CONCURRENCY, socket_path=None):
+        secret_token = get_secret_token() if secret_token is None else secret_token
+        socket_path = get_socket_path() if socket_path is None else socket_path
+        self.socket_path = socket_path if socket_path and os.path.exists(
+            socket_path) else None
+        self.server_url = "http://localhost" if self.socket_path else f"http://{server_host}:{server_port}"
+        self.headers = {'Content-Type': 'application/json',
+                        'Accept': accepted_content_types(),
+                        'Accept-Encoding': 'gzip'}
         if secret_token:
             self.headers['Authorization'] = f"Bearer {secret_token}"
+        self.timeout = timeout
+        self.cache = ResponseCache()
 
-    def send_command(self, command):
-        """Send a generic command to the server."""
+        # Read errors are not retried: the server may already have executed the command.
+        retry = Retry(total=retries, connect=retries, read=0, status=retries, backoff_factor=backoff_factor,
+                      status_forcelist=(502, 503, 504), allowed_methods=None, raise_on_status=False)
+        if self.socket_path:
+            adapter = UnixSocketAdapter(
+                self.socket_path, max_retries=retry, pool_maxsize=pool_size)
+        else:
+            adapter = HTTPAdapter(max_retries=retry,
+                                  pool_connections=1, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount('http://', adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the underlying connections."""
+        self.session.close()
+
+    def send_command(self, command, timeout=None):
+        """Send a generic command to the server, waiting `timeout` seconds instead of the default."""
+        timeout = timeout or self.timeout
+        data = json.dumps(command)
+        cached = self.cache.get(data) if command.get(
+            'command') in CACHED_COMMANDS else None
         try:
-            response = requests.post(self.server_url, headers=self.headers, data=json.dumps(command))
+            if cached:
+                response = self.session.post(self.server_url, data=data, timeout=timeout,
+                                             headers={'If-None-Match': cached[0]})
+            else:
+                response = self.session.post(
+                    self.server_url, data=data, timeout=timeout)
             response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            if response.status_code == 304 and cached:
+                return cached[1]
+            content_type = response.headers.get('Content-Type')
+            if content_type == MSGPACK_CONTENT_TYPE:
+                result = decode_response(response.content, content_type)
+            else:
+                result = response.json()
+            etag = response.headers.get('ETag')
+            if isinstance(etag, str) and command.get('command') in CACHED_COMMANDS:
+                self.cache.put(data, etag, result)
+            return result
+        except (requests.RequestException, ValueError) as e:
             logging.error(f"Error communicating with server: {e}")
             return None
 
-    def submit_task(self, working_dir, script_name="submit.sh"):
+    def follow_output(self, job_id, lines=OUTPUT_TAIL_LINES):
+        """Yield the last lines of a job's output, then new output until the job ends."""
+        try:
+            with self.session.get(f"{self.server_url}/output/{job_id}", params={"lines": lines},
+                                  stream=True, timeout=(self.timeout, None)) as response:
+                response.raise_for_status()
+                # Chunks may split multi-byte characters
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+                for chunk in response.iter_content(chunk_size=None):
+                    yield decoder.decode(chunk)
+        except requests.RequestException as e:
+            logging.error(f"Error communicating with server: {e}")
+
+
+class AsyncSlurmJobTrackerClient:
+    """
+    Asyncio client to communicate with the Slurm Job Tracker server.
+
+    Commands are executed on a thread pool sharing one `SlurmJobTrackerClient` connection
+    pool, so up to `max_concurrency` commands are in flight at the same time, each on its
+    own keep-alive connection. Use `send_commands` to pipeline a batch of commands.
+
+    Example:
+        async with AsyncSlurmJobTrackerClient() as client:
+            responses = await client.send_commands([{"command": "get_info"}] * 10)
+    """
+
+    def __init__(self, server_host=SERVER_HOST, server_port=SERVER_PORT, secret_token=None,
+                 timeout=CLIENT_TIMEOUT, retries=CLIENT_RETRIES, backoff_factor=CLIENT_BACKOFF,
+                 max_concurrency=CLIENT_MAX_CONCURRENCY, socket_path=None):
+        self.client = SlurmJobTrackerClient(server_host, server_port, secret_token, timeout=timeout,
+                                            retries=retries, backoff_factor=backoff_factor,
+                                            pool_size=max_concurrency, socket_path=socket_path)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shut down the worker threads and close the connections."""
+        self.executor.shutdown(wait=True)
+        self.client.close()
+
+    async def send_command(self, command):
+        """Send a generic command to the server."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.client.send_command, command)
+
+    async def send_commands(self, commands):
+        """Send several commands concurrently, returning the responses in order."""
+        return await asyncio.gather(*(self.send_command(command) for command in commands))
+
+    async def submit_task(self, working_dir, script_name="submit.sh", idempotency_key=None, max_resubmits=None):
         """Submit a new task to the job tracker."""
-        command = {
-            "command": "submit_task",
-            "args": {"working_dir": working_dir, "script_name": script_name}
-        }
-        return self.send_command(command)
-
-    def get_status(self):
-        """Retrieve the current status of running jobs."""
-        command = {"command": "get_status"}
-        return self.send_command(command)
-
-    def get_queue(self):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.client.submit_task, working_dir, script_name,
+                                          idempotency_key, max_resubmits)
+
+    async def get_status(self, nodes=None, state=None, job_id=None):
+        """Retrieve the current status of running jobs, optionally filtered by nodes, state or job id."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.client.get_status, nodes, state, job_id)
+
+    async def get_node(self, node):
+        """Retrieve the tracked jobs running on a node or on the nodes of a hostlist."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.client.get_node, node)
+
+    async def get_queue(self):
         """Retrieve the list of tasks in the submission queue."""
-        command = {"command": "get_queue"}
-        return self.send_command(command)
-    
-    def get_info(self):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.client.get_queue)
+
+    async def get_info(self):
         """Retrieve information about the job tracker."""
-        command = {"command": "get_info"}
-        return self.send_command(command)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.client.get_info)
+
+    async def get_stats(self):
+        """Retrieve runtime statistics and the queue drain estimate."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.client.get_stats)
+
+    async def submit_workflow(self, tasks, name=None):
+        """Submit a workflow of dependent tasks."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.client.submit_workflow, tasks, name)
+
+    async def get_workflow(self, workflow_id=None, include_tasks=True):
+        """Retrieve the status of a workflow, or a summary of all workflows."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.client.get_workflow, workflow_id, include_tasks)
+
+    async def get_profile(self, duration=0, limit=None):
+        """Retrieve recent tick traces and, for a positive `duration`, a profile of the server threads."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.client.get_profile, duration, limit)
+
+    async def tail_output(self, job_id, lines=OUTPUT_TAIL_LINES, offset=None, length=None):
+        """Retrieve the last lines, or a byte range starting at `offset`, of a job's output."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.client.tail_output, job_id, lines, offset, length)
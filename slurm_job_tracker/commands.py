@@ -0,0 +1,156 @@
+import threading
+from collections import OrderedDict
+
+from .config import CLIENT_CACHE_SIZE, OUTPUT_TAIL_LINES
+
+# Commands that do not modify the tracker state
+READ_ONLY_COMMANDS = ('get_status', 'get_queue', 'get_info',
+                      'get_stats', 'tail_output', 'get_workflow', 'get_node')
+# Read-only commands whose responses clients cache; output chunks are large and rarely asked for twice
+CACHED_COMMANDS = tuple(command for command in READ_ONLY_COMMANDS if command != 'tail_output')
+
+
+class ResponseCache:
+    """
+    Least recently used cache of ``(etag, response)`` pairs keyed by the command JSON.
+
+    Attributes:
+        size (int): Maximum number of cached responses.
+    """
+
+    def __init__(self, size=CLIENT_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        """Return the cached ``(etag, response)`` of `key`, or None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, etag, response):
+        """Cache a response, evicting the least recently used one if the cache is full."""
+        with self.lock:
+            self.entries[key] = (etag, response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+class TrackerCommands:
+    """
+    Tracker commands shared by the clients.
+
+    Subclasses implement `send_command`, which sends a command dict to the server and
+    returns the decoded response, or None if the server could not be reached, and set
+    `timeout`, the default number of seconds to wait for a response. This
+    module imports nothing but the configuration, so it is cheap to load.
+    """
+
+    def send_command(self, command, timeout=None):
+        """Send a generic command to the server, waiting `timeout` seconds instead of the default."""
+        raise NotImplementedError
+
+    def submit_task(self, working_dir, script_name="submit.sh", idempotency_key=None, max_resubmits=None):
+        """
+        Submit a new task to the job tracker.
+
+        Repeating a submission with the same `idempotency_key` returns the original task
+        instead of queuing a duplicate. `max_resubmits` overrides how often the job is
+        resubmitted if it ends in a failure state.
+        """
+        command = {
+            "command": "submit_task",
+            "args": {"working_dir": working_dir, "script_name": script_name}
+        }
+        if idempotency_key is not None:
+            command["args"]["idempotency_key"] = idempotency_key
+        if max_resubmits is not None:
+            command["args"]["max_resubmits"] = max_resubmits
+        return self.send_command(command)
+
+    def get_status(self, nodes=None, state=None, job_id=None):
+        """
+        Retrieve the current status of running jobs.
+
+        With `nodes` (a hostlist such as ``node[01-04]``) or `state` (a squeue state
+        code), only the matching running jobs are returned. With `job_id`, only that
+        job is returned, among the running or the completed jobs.
+        """
+        command = {"command": "get_status"}
+        args = {key: value for key, value in (("nodes", nodes), ("state", state), ("job_id", job_id)) if value}
+        if args:
+            command["args"] = args
+        return self.send_command(command)
+
+    def get_node(self, node):
+        """Retrieve the tracked jobs running on a node or on the nodes of a hostlist."""
+        command = {"command": "get_node", "args": {"node": node}}
+        return self.send_command(command)
+
+    def get_queue(self):
+        """Retrieve the list of tasks in the submission queue."""
+        command = {"command": "get_queue"}
+        return self.send_command(command)
+
+    def get_info(self):
+        """Retrieve information about the job tracker."""
+        command = {"command": "get_info"}
+        return self.send_command(command)
+
+    def get_stats(self):
+        """Retrieve runtime statistics and the queue drain estimate."""
+        command = {"command": "get_stats"}
+        return self.send_command(command)
+
+    def submit_workflow(self, tasks, name=None):
+        """
+        Submit a workflow of dependent tasks.
+
+        `tasks` is a list of dicts with the keys `name`, `working_dir`, `script_name`
+        and `depends_on` (list of task names).
+        """
+        command = {
+            "command": "submit_workflow",
+            "args": {"tasks": tasks, "name": name}
+        }
+        return self.send_command(command)
+
+    def get_workflow(self, workflow_id=None, include_tasks=True):
+        """Retrieve the status of a workflow, or a summary of all workflows."""
+        args = {"include_tasks": include_tasks}
+        if workflow_id is not None:
+            args["workflow_id"] = workflow_id
+        command = {"command": "get_workflow", "args": args}
+        return self.send_command(command)
+
+    def get_profile(self, duration=0, limit=None):
+        """
+        Retrieve the traces of the recent tracker ticks.
+
+        With a positive `duration` the server also samples the stacks of its threads for
+        that many seconds and returns the aggregated profile. `limit` caps the number of
+        returned ticks.
+        """
+        args = {"duration": duration}
+        if limit is not None:
+            args["limit"] = limit
+        command = {"command": "get_profile", "args": args}
+        return self.send_command(command, timeout=self.timeout + duration)
+
+    def tail_output(self, job_id, lines=OUTPUT_TAIL_LINES, offset=None, length=None):
+        """Retrieve the last lines, or a byte range starting at `offset`, of a job's output."""
+        args = {"job_id": str(job_id), "lines": lines}
+        if offset is not None:
+            args.update({"offset": offset, "length": length})
+        command = {"command": "tail_output", "args": args}
+        return self.send_command(command)
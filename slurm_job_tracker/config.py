@@ -1,15 +1,69 @@
 import os
 
-from dotenv import load_dotenv
+_dotenv_loaded = False
 
-load_dotenv()
+
+def getenv(name, default=None):
+    """
+    Read an environment variable, loading the `.env` file only if it is not set.
+
+    python-dotenv is imported on first use, so commands that find everything in the
+    environment (or need no settings at all) start without it.
+    """
+    global _dotenv_loaded
+    if name not in os.environ and not _dotenv_loaded:
+        _dotenv_loaded = True
+        try:
+            from dotenv import load_dotenv
+        except ImportError:  # Settings then come from the environment only
+            pass
+        else:
+            load_dotenv()
+    return os.getenv(name, default)
 
 # Server configuration
 SERVER_HOST = '127.0.0.1'
 SERVER_PORT = 8000
+REPLICA_PORT = 8001  # Port of read-only replicas started with `slurm-job-tracker --replica`
+
+# Unix domain socket for local clients (optional). Access is restricted to the owner
+# of the socket file, so no token is required on this transport.
+def get_socket_path():
+    return getenv('SLURM_TRACKER_SOCKET', '')
+
+
+# Set SLURM_TRACKER_TCP=0 to serve only on the Unix socket
+def get_server_tcp():
+    return getenv('SLURM_TRACKER_TCP', '1') != '0'
+
+
+# Client configuration
+CLIENT_TIMEOUT = 10  # Seconds to wait for the server
+CLIENT_RETRIES = 3  # Retries for failed connections
+CLIENT_BACKOFF = 0.5  # Backoff factor in seconds between retries
+CLIENT_MAX_CONCURRENCY = 10  # Concurrent connections of the async client
+CLIENT_CACHE_SIZE = 32  # Responses of read-only commands cached with their ETag
+
+# Responses larger than this many bytes are gzip compressed if the client accepts it
+COMPRESSION_THRESHOLD = 1024
 
 # Authentication token (optional)
-SECRET_TOKEN = os.getenv('SLURM_TRACKER_TOKEN', '')
+def get_secret_token():
+    return getenv('SLURM_TRACKER_TOKEN', '')
+
+
+# Settings read from the environment on access rather than at import time
+_ENV_SETTINGS = {
+    'SOCKET_PATH': get_socket_path,
+    'SERVER_TCP': get_server_tcp,
+    'SECRET_TOKEN': get_secret_token,
+}
+
+
+def __getattr__(name):
+    if name in _ENV_SETTINGS:
+        return _ENV_SETTINGS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def mask_token(token, visible_length=4):
@@ -21,8 +75,9 @@ def mask_token(token, visible_length=4):
 
 def debug_token():
     """Print the masked token for debugging purposes."""
-    if SECRET_TOKEN:
-        print(f"Loaded SLURM_TRACKER_TOKEN: {mask_token(SECRET_TOKEN)}")
+    secret_token = get_secret_token()
+    if secret_token:
+        print(f"Loaded SLURM_TRACKER_TOKEN: {mask_token(secret_token)}")
     else:
         print("No SLURM_TRACKER_TOKEN found in environment.")
 
@@ -31,6 +86,49 @@ def debug_token():
 TRACKER_INTERVAL = 5  # Interval in seconds
 MAX_JOBS = 50
 
+# Submission retries
+SUBMIT_RETRIES = 3  # Retries of a failed sbatch call before the task is dropped
+SUBMIT_RETRY_DELAY = 30  # Seconds before the first retry, doubled for every further retry
+SUBMIT_RETRY_MAX_DELAY = 600  # Maximum delay in seconds between retries
+MAX_RESUBMITS = 0  # Default number of resubmissions of jobs ending in RESUBMIT_STATES
+RESUBMIT_STATES = ('BOOT_FAIL', 'NODE_FAIL', 'PREEMPTED',
+                   'FAILED', 'OUT_OF_MEMORY', 'TIMEOUT')
+IDEMPOTENCY_TTL = 86400  # Seconds an idempotency key is remembered
+
+# Submission governor
+MAX_PENDING_JOBS = None  # Target number of pending jobs in the Slurm queue (None to disable)
+SUBMIT_LOOKAHEAD = 0  # Seconds ahead to predict job completions (0 to disable)
+SUBMIT_OVERCOMMIT = 0.1  # Fraction of MAX_JOBS that may be submitted ahead of predicted completions
+MIN_RUNTIME_SAMPLES = 3  # Finished jobs required before runtimes are predicted
+
+# Accounting
+SACCT_MAX_ATTEMPTS = 5  # Ticks to wait for a final sacct record of a finished job
+SACCT_BATCH_SIZE = 500  # Maximum number of job ids per sacct call
+SACCT_RECONCILED_IDS = 10000  # Most recent reconciled job ids remembered to skip repeated lookups
+
+# Job output access
+OUTPUT_TAIL_LINES = 20  # Default number of lines returned by tail_output
+OUTPUT_MAX_BYTES = 1024 * 1024  # Maximum number of bytes returned per read
+OUTPUT_CACHE_SIZE = 128  # Number of output files whose tail is cached
+OUTPUT_POLL_INTERVAL = 1  # Seconds between checks of a followed output file
+
+# Workflows
+WORKFLOW_SLURM_DEPENDENCIES = True  # Submit downstream tasks early with --dependency=afterok
+
+# Statistics
+STATS_WINDOW = 3600  # Window in seconds used to compute job throughput
+STATS_SAMPLE_SIZE = 1000  # Most recent runtimes per aggregate used for percentiles
+STATS_RECORDED_IDS = 10000  # Most recent job ids remembered to skip duplicate records
+
+# Tracing and profiling
+TRACE_BUFFER_SIZE = 100  # Number of recent tick traces kept in memory
+SLOW_TICK_THRESHOLD = 30  # Ticks taking longer than this many seconds are exported to SLOW_TICK_FILE
+PROFILE_MAX_DURATION = 60  # Maximum duration in seconds of a get_profile capture
+PROFILE_SAMPLE_INTERVAL = 0.005  # Seconds between stack samples of a get_profile capture
+PROFILE_TOP = 25  # Number of functions reported per thread
+
 # File paths
 HISTORY_FILE = 'slurm_jobs_history.json'
 CURRENT_FILE = 'slurm_jobs_current.json'
+SLOW_TICK_FILE = 'slurm_slow_ticks.jsonl'
+SNAPSHOT_FILE = 'slurm_jobs_snapshot.bin'  # State published for replicas when it changes (None to disable)
@@ -0,0 +1,48 @@
+class JobDelta:
+    """
+    Difference between the tracked jobs and a new squeue poll.
+
+    Attributes:
+        added (dict): ``(start_time, nodelist, state)`` of jobs seen for the first time, keyed by job id.
+        changed (dict): ``(start_time, nodelist, state)`` of tracked jobs that changed, keyed by job id.
+        removed (list): Ids of tracked jobs that are no longer in squeue.
+    """
+
+    __slots__ = ('added', 'changed', 'removed')
+
+    def __init__(self):
+        self.added = {}
+        self.changed = {}
+        self.removed = []
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self):
+        return f"{len(self.added)} new, {len(self.changed)} changed, {len(self.removed)} finished"
+
+
+def diff_jobs(jobs, current_jobs):
+    """
+    Compare the tracked `jobs` with the ``(job_id, start_time, nodelist, state)`` rows of a squeue poll.
+
+    Jobs are matched by id. A tracked job counts as changed if its node list or state
+    differs, or if its start time was unknown so far; the start time squeue reports is
+    derived from the elapsed time and drifts between polls, so it is not compared
+    otherwise. Unchanged jobs cost a dict lookup and allocate nothing.
+    """
+    delta = JobDelta()
+    seen = set()
+    for job_id, start_time, nodelist, state in current_jobs:
+        seen.add(job_id)
+        job_info = jobs.get(job_id)
+        if job_info is None:
+            delta.added[job_id] = (start_time, nodelist, state)
+        elif (job_info.get('nodelist') != nodelist or job_info.get('state') != state
+              or (job_info.get('start_time') is None and start_time is not None)):
+            delta.changed[job_id] = (start_time, nodelist, state)
+
+    # Every tracked job was seen unless fewer tracked jobs than polled ones were matched
+    if len(seen) - len(delta.added) < len(jobs):
+        delta.removed = [job_id for job_id in jobs if job_id not in seen]
+    return delta
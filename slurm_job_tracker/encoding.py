@@ -0,0 +1,63 @@
+import gzip
+import hashlib
+import json
+
+try:
+    import msgpack
+except ImportError:  # Optional dependency, fall back to compact JSON
+    msgpack = None
+
+from .config import COMPRESSION_THRESHOLD
+
+JSON_CONTENT_TYPE = 'application/json'
+MSGPACK_CONTENT_TYPE = 'application/msgpack'
+
+
+def accepted_content_types():
+    """Return the Accept header value a client should send, preferring msgpack when installed."""
+    if msgpack is not None:
+        return f"{MSGPACK_CONTENT_TYPE}, {JSON_CONTENT_TYPE}"
+    return JSON_CONTENT_TYPE
+
+
+def compute_etag(response):
+    """
+    Compute an ETag for a command response.
+
+    The `timestamp` field changes on every call and is ignored, so two responses
+    describing the same state share their ETag.
+    """
+    payload = {key: value for key, value in response.items()
+               if key != 'timestamp'}
+    digest = hashlib.blake2b(json.dumps(payload, sort_keys=True, default=str).encode(),
+                             digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def encode_response(response, accept='', accept_encoding=''):
+    """
+    Serialize a command response according to the request's Accept headers.
+
+    Returns a tuple ``(body, content_type, content_encoding)``; `content_encoding` is
+    ``'gzip'`` when the body was compressed and None otherwise. Bodies smaller than
+    COMPRESSION_THRESHOLD bytes are sent uncompressed.
+    """
+    if msgpack is not None and MSGPACK_CONTENT_TYPE in (accept or ''):
+        body = msgpack.packb(response, use_bin_type=True, default=str)
+        content_type = MSGPACK_CONTENT_TYPE
+    else:
+        body = json.dumps(response, separators=(',', ':')).encode()
+        content_type = JSON_CONTENT_TYPE
+
+    if 'gzip' in (accept_encoding or '') and len(body) >= COMPRESSION_THRESHOLD:
+        return gzip.compress(body, compresslevel=5), content_type, 'gzip'
+    return body, content_type, None
+
+
+def decode_response(body, content_type):
+    """Deserialize a (decompressed) response body."""
+    if content_type == MSGPACK_CONTENT_TYPE:
+        if msgpack is None:
+            raise ValueError("Received a msgpack response but msgpack is not installed.")
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
@@ -0,0 +1,88 @@
+import datetime
+import logging
+import math
+
+from .config import MAX_JOBS, MAX_PENDING_JOBS, SUBMIT_LOOKAHEAD, SUBMIT_OVERCOMMIT
+from .utils import parse_timestamp
+
+PENDING_STATES = ('PD', 'PENDING')
+
+
+class SubmissionGovernor:
+    """
+    Decide how many queued tasks may be submitted on a given tick.
+
+    The governor separates pending jobs from running ones and supports two limits:
+
+    - ``max_jobs``: hard cap on jobs known to Slurm (running + pending).
+    - ``max_pending``: optional target depth of pending jobs. When set, the tracker
+      keeps that many jobs waiting in the Slurm queue instead of filling up to
+      ``max_jobs`` at once.
+
+    With a non-zero ``lookahead`` the governor uses the runtime statistics of
+    finished jobs (see ``JobStatistics``) to predict which running jobs will
+    finish within the next ``lookahead`` seconds, and counts their slots as free
+    so replacements are submitted just ahead of the completions. Jobs that have
+    overrun their expected runtime by more than ``lookahead`` are no longer
+    expected to finish soon. Early submissions are bounded by ``max_overcommit``:
+    running plus pending jobs never exceed ``max_jobs + max_overcommit``.
+
+    Attributes:
+        max_jobs (int): Maximum number of running and pending jobs.
+        max_pending (int or None): Target number of pending jobs, or None to disable.
+        lookahead (int): Prediction horizon in seconds, 0 disables prediction.
+        max_overcommit (int): Jobs that may be submitted above max_jobs ahead of predicted completions.
+    """
+
+    def __init__(self, max_jobs=MAX_JOBS, max_pending=MAX_PENDING_JOBS, lookahead=SUBMIT_LOOKAHEAD,
+                 max_overcommit=None):
+        self.max_jobs = max_jobs
+        self.max_pending = max_pending
+        self.lookahead = lookahead
+        self.max_overcommit = math.ceil(max_jobs * SUBMIT_OVERCOMMIT) if max_overcommit is None else max_overcommit
+
+    @staticmethod
+    def is_pending(state):
+        """Check whether a squeue state code denotes a pending job."""
+        return state in PENDING_STATES
+
+    def count_jobs(self, jobs):
+        """Return ``(running, pending)`` counts for a ``job_id -> job_info`` mapping."""
+        pending = sum(1 for job_info in jobs.values()
+                      if self.is_pending(job_info.get('state')))
+        return len(jobs) - pending, pending
+
+    def predict_completions(self, jobs, stats, now=None):
+        """Return the ids of running jobs expected to finish within the lookahead window."""
+        if not self.lookahead:
+            return []
+
+        now = now or datetime.datetime.now()
+        finishing = []
+        for job_id, job_info in jobs.items():
+            if self.is_pending(job_info.get('state')):
+                continue
+            start = parse_timestamp(job_info.get('start_time'))
+            expected = stats.expected_runtime(job_info.get('directory'))
+            if start is None or expected is None:
+                continue
+            remaining = expected - (now - start).total_seconds()
+            # Jobs long past their expected end are outliers, their end cannot be predicted
+            if -self.lookahead <= remaining <= self.lookahead:
+                finishing.append(job_id)
+        return finishing
+
+    def available_slots(self, jobs, stats, now=None):
+        """Return the number of tasks that may be submitted right now."""
+        running, pending = self.count_jobs(jobs)
+        finishing = len(self.predict_completions(jobs, stats, now))
+        early = min(finishing, self.max_overcommit)
+
+        slots = self.max_jobs - (running + pending) + early
+        if self.max_pending is not None:
+            slots = min(slots, self.max_pending - pending + early)
+
+        logging.info(
+            f"Capacity: {running} running, {pending} pending, {finishing} expected to finish soon, "
+            f"{max(slots, 0)} slots available.")
+        return max(slots, 0)
@@ -0,0 +1,158 @@
+import re
+from itertools import groupby, product
+
+# A host name ending in digits, e.g. node012 -> ('node', '012')
+NUMBERED_HOST = re.compile(r'^(.*?)(\d+)$')
+
+
+def split_hostlist(hostlist):
+    """Split a hostlist at the commas that are not inside brackets."""
+    if not isinstance(hostlist, str):
+        raise ValueError(f"Hostlist must be a string, not {type(hostlist).__name__}")
+    items = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(hostlist):
+        if char == '[':
+            depth += 1
+            if depth > 1:
+                raise ValueError(f"Nested brackets in hostlist: {hostlist}")
+        elif char == ']':
+            depth -= 1
+            if depth < 0:
+                raise ValueError(f"Unbalanced brackets in hostlist: {hostlist}")
+        elif char == ',' and depth == 0:
+            items.append(hostlist[start:i])
+            start = i + 1
+    if depth:
+        raise ValueError(f"Unbalanced brackets in hostlist: {hostlist}")
+    items.append(hostlist[start:])
+    return [item for item in items if item]
+
+
+def expand_range(ranges):
+    """Expand the inside of a bracket, e.g. ``012-014,020``, keeping zero padding."""
+    values = []
+    for part in ranges.split(','):
+        low, _, high = part.partition('-')
+        if not low.isdigit() or (high and not high.isdigit()):
+            raise ValueError(f"Invalid range in hostlist: [{ranges}]")
+        if not high:
+            values.append(low)
+            continue
+        if int(high) < int(low):
+            raise ValueError(f"Decreasing range in hostlist: [{ranges}]")
+        values.extend(str(number).zfill(len(low)) for number in range(int(low), int(high) + 1))
+    return values
+
+
+def expand_hostlist(hostlist):
+    """
+    Expand a Slurm hostlist expression into the list of host names.
+
+    Supports comma separated items, ranges with zero padding and several bracket
+    groups per item: ``node[01-03,07],gpu[1-2]-ib`` expands to ``node01``, ``node02``,
+    ``node03``, ``node07``, ``gpu1-ib`` and ``gpu2-ib``. Raises ValueError for
+    malformed expressions.
+    """
+    hosts = []
+    for item in split_hostlist(hostlist or ''):
+        # Alternate literal text and bracket contents: 'a[1-2]b[3]' -> ['a', '1-2', 'b', '3', '']
+        parts = re.split(r'\[([^\]]*)\]', item)
+        choices = [[part] if i % 2 == 0 else expand_range(part)
+                   for i, part in enumerate(parts)]
+        hosts.extend(''.join(combination) for combination in product(*choices))
+    return hosts
+
+
+def compress_hostlist(hosts):
+    """
+    Compress host names into a Slurm hostlist expression, the inverse of `expand_hostlist`.
+
+    Hosts sharing a prefix and the width of their numeric suffix are merged into one
+    bracket with ranges of consecutive numbers; duplicates are dropped.
+    """
+    numbered = set()
+    plain = set()
+    for host in hosts:
+        match = NUMBERED_HOST.match(host)
+        if match:
+            numbered.add((match.group(1), len(match.group(2)), int(match.group(2))))
+        else:
+            plain.add(host)
+
+    items = sorted(plain)
+    for (prefix, width), group in groupby(sorted(numbered), key=lambda host: host[:2]):
+        numbers = [number for _, _, number in group]
+        ranges = []
+        for _, run in groupby(enumerate(numbers), key=lambda pair: pair[1] - pair[0]):
+            run = [number for _, number in run]
+            low, high = str(run[0]).zfill(width), str(run[-1]).zfill(width)
+            ranges.append(low if low == high else f"{low}-{high}")
+        if len(numbers) == 1:
+            items.append(f"{prefix}{ranges[0]}")
+        else:
+            items.append(f"{prefix}[{','.join(ranges)}]")
+    return ','.join(items)
+
+
+class NodeIndex:
+    """
+    Inverted index from node names to the ids of the jobs running on them.
+
+    The index is updated job by job as the tracker sees jobs start, move and finish,
+    so looking up the jobs of a node takes constant time however many jobs are
+    tracked. Jobs waiting with a Slurm reason instead of a node list are not indexed.
+
+    Attributes:
+        nodes (dict): Set of job ids keyed by node name.
+        jobs (dict): Tuple of node names keyed by job id.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.jobs = {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def update(self, job_id, nodelist):
+        """Index `job_id` under the nodes of its squeue NODELIST(REASON) value."""
+        self.remove(job_id)
+        if not nodelist or nodelist.startswith('('):
+            return
+        nodes = tuple(expand_hostlist(nodelist))
+        self.jobs[job_id] = nodes
+        for node in nodes:
+            self.nodes.setdefault(node, set()).add(job_id)
+
+    def remove(self, job_id):
+        """Remove a job from the index."""
+        for node in self.jobs.pop(job_id, ()):
+            job_ids = self.nodes[node]
+            job_ids.discard(job_id)
+            if not job_ids:
+                del self.nodes[node]
+
+    def get(self, node):
+        """Return the ids of the jobs running on `node`."""
+        return self.nodes.get(node, set())
+
+    def select(self, jobs, nodes=None, state=None):
+        """
+        Return the entries of `jobs` running on any node of the hostlist `nodes` and in squeue `state`.
+
+        Raises ValueError for an invalid hostlist.
+        """
+        if nodes:
+            job_ids = set()
+            for node in expand_hostlist(nodes):
+                job_ids.update(self.get(node))
+        else:
+            job_ids = jobs
+        return {job_id: jobs[job_id] for job_id in sorted(job_ids)
+                if job_id in jobs and (not state or jobs[job_id].get('state') == state)}
+
+    def lookup(self, hostlist):
+        """Return the job ids of every node in a hostlist expression, keyed by node."""
+        return {node: sorted(self.get(node)) for node in expand_hostlist(hostlist)}
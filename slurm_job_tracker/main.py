@@ -1,8 +1,9 @@
+import argparse
 import logging
 import threading
 
-from .config import debug_token
-from .server import run_server
+from .config import REPLICA_PORT, SNAPSHOT_FILE, debug_token
+from .server import run_replica, run_server
 from .tracker import SlurmJobTracker
 from .utils import setup_logging
 
@@ -16,8 +17,24 @@ def main():
     and handles graceful shutdown on a keyboard interrupt.
     """
     """Main function to start the Slurm Job Tracker and HTTP server."""
+    parser = argparse.ArgumentParser(description="Slurm Job Tracker server")
+    parser.add_argument('--replica', action='store_true',
+                        help="Serve read-only commands from the snapshot published by the tracker")
+    parser.add_argument('--port', type=int, default=REPLICA_PORT, help="Port of the replica")
+    parser.add_argument('--snapshot', default=SNAPSHOT_FILE, help="Snapshot file read by the replica")
+    args = parser.parse_args()
+
     setup_logging()
     debug_token()
+    if args.replica:
+        from .replica import ReplicaTracker
+        logging.info(f"Started read-only replica of {args.snapshot}.")
+        try:
+            run_replica(ReplicaTracker(args.snapshot), args.port)
+        except KeyboardInterrupt:
+            logging.info("Shutting down replica.")
+        return
+
     tracker = SlurmJobTracker()
     server_thread = threading.Thread(target=run_server, args=(tracker,))
     server_thread.daemon = True  # Ensures the server thread exits with the main thread
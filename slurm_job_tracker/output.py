@@ -0,0 +1,94 @@
+import os
+import threading
+from collections import OrderedDict
+
+from .config import OUTPUT_CACHE_SIZE, OUTPUT_MAX_BYTES
+
+BLOCK_SIZE = 65536
+
+
+def last_lines(data, lines):
+    """Return the suffix of `data` holding its last `lines` lines."""
+    pos = len(data) - 1 if data.endswith(b'\n') else len(data)
+    for _ in range(lines):
+        pos = data.rfind(b'\n', 0, pos)
+        if pos == -1:
+            return data
+    return data[pos + 1:]
+
+
+class OutputReader:
+    """
+    Read the end or a byte range of job output files without reading the whole file.
+
+    The last lines are found by reading blocks backwards from the end of the file.
+    For every file the size and tail seen by the previous request are cached, so
+    following a growing file only reads the bytes appended since then.
+
+    Attributes:
+        max_bytes (int): Maximum number of bytes returned by a single read.
+        cache_size (int): Number of files whose tail is cached.
+    """
+
+    def __init__(self, max_bytes=OUTPUT_MAX_BYTES, cache_size=OUTPUT_CACHE_SIZE):
+        self.max_bytes = max_bytes
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def tail(self, path, lines):
+        """Return the last `lines` lines of `path` as ``(data, offset, size)``."""
+        size = os.path.getsize(path)
+        with self.lock:
+            cached = self.cache.get(path)
+
+        if (cached is not None and cached['lines'] >= lines and cached['size'] <= size
+                and size - cached['size'] <= self.max_bytes):
+            data = cached['data']
+            if size > cached['size']:
+                with open(path, 'rb') as f:
+                    f.seek(cached['size'])
+                    data += f.read(size - cached['size'])
+            kept_lines = cached['lines']
+            data = last_lines(data, kept_lines)[-self.max_bytes:]
+        else:
+            kept_lines = lines
+            data = self.read_tail(path, lines, size)
+
+        with self.lock:
+            self.cache[path] = {'size': size, 'lines': kept_lines, 'data': data}
+            self.cache.move_to_end(path)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        data = last_lines(data, lines)
+        return data, size - len(data), size
+
+    def read_tail(self, path, lines, size):
+        """Read blocks backwards from the end of `path` until `lines` lines are found."""
+        data = b''
+        pos = size
+        with open(path, 'rb') as f:
+            while pos > 0 and len(data) < self.max_bytes and data.count(b'\n') <= lines:
+                block = min(BLOCK_SIZE, pos)
+                pos -= block
+                f.seek(pos)
+                data = f.read(block) + data
+        return last_lines(data, lines)[-self.max_bytes:]
+
+    def read(self, path, offset, length=None):
+        """
+        Read up to `length` bytes of `path` starting at `offset` as ``(data, offset, size)``.
+
+        A negative `offset` counts from the end of the file. `length` is clamped to
+        1..`max_bytes`. If nothing was appended since `offset` the file is not opened at all.
+        """
+        size = os.path.getsize(path)
+        if offset < 0:
+            offset = max(size + offset, 0)
+        length = self.max_bytes if not length else min(max(length, 1), self.max_bytes)
+        if offset >= size:
+            return b'', size, size
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            return f.read(length), offset, size
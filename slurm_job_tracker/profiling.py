@@ -0,0 +1,153 @@
+import datetime
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+
+from .config import (PROFILE_SAMPLE_INTERVAL, PROFILE_TOP, SLOW_TICK_FILE, SLOW_TICK_THRESHOLD,
+                     TRACE_BUFFER_SIZE)
+
+
+class TickTracer:
+    """
+    Trace the phases of the tracker's ticks.
+
+    A tick is recorded as a list of named spans with their start offset, duration and
+    nesting depth. The last `size` ticks are kept in a ring buffer, and ticks taking
+    longer than `slow_threshold` seconds are appended to `export_file` as JSON lines.
+    Spans are only recorded on the thread running the tick; elsewhere they are no-ops.
+
+    Attributes:
+        slow_threshold (float or None): Duration in seconds above which a tick is exported.
+        export_file (str): File the traces of slow ticks are appended to.
+        ticks (deque): The most recent tick traces.
+    """
+
+    def __init__(self, size=TRACE_BUFFER_SIZE, slow_threshold=SLOW_TICK_THRESHOLD, export_file=SLOW_TICK_FILE):
+        self.slow_threshold = slow_threshold
+        self.export_file = export_file
+        self.ticks = deque(maxlen=size)
+        self.lock = threading.Lock()
+        self.count = 0
+        self.current = None
+        self.thread = None
+        self.tick_start = 0
+        self.depth = 0
+
+    @contextmanager
+    def tick(self):
+        """Record a tick; spans opened inside the block become part of its trace."""
+        self.count += 1
+        self.current = {'tick': self.count,
+                        'timestamp': str(datetime.datetime.now()), 'spans': []}
+        self.thread = threading.get_ident()
+        self.tick_start = time.perf_counter()
+        try:
+            yield self.current
+        finally:
+            self.end_tick()
+
+    def end_tick(self):
+        trace, self.current, self.thread = self.current, None, None
+        trace['duration'] = round(time.perf_counter() - self.tick_start, 6)
+        trace['spans'].sort(key=lambda span: span['start'])
+        with self.lock:
+            self.ticks.append(trace)
+        if self.slow_threshold is not None and trace['duration'] > self.slow_threshold:
+            logging.warning(
+                f"Tick {trace['tick']} took {trace['duration']:.1f}s, exporting its trace to {self.export_file}.")
+            self.export(trace)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Time the enclosed block as a span of the current tick."""
+        if self.current is None or threading.get_ident() != self.thread:
+            yield
+            return
+        start = time.perf_counter()
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            self.current['spans'].append({
+                'name': name,
+                'start': round(start - self.tick_start, 6),
+                'duration': round(time.perf_counter() - start, 6),
+                'depth': self.depth,
+                **attributes
+            })
+
+    def export(self, trace):
+        """Append a trace to the export file."""
+        try:
+            with open(self.export_file, 'a') as f:
+                f.write(json.dumps(trace, default=str) + '\n')
+        except OSError as e:
+            logging.error(f"Error exporting tick trace: {e}")
+
+    def recent(self, limit=None):
+        """Return the most recent traces, oldest first."""
+        with self.lock:
+            ticks = list(self.ticks)
+        return ticks[-limit:] if limit else ticks
+
+
+def describe_code(code):
+    """Format a code object like pstats does: ``file:line(function)``."""
+    return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+
+def sample_stacks(duration, interval=PROFILE_SAMPLE_INTERVAL, top=PROFILE_TOP):
+    """
+    Profile all other threads by sampling their stacks for `duration` seconds.
+
+    cProfile only instruments the thread it is enabled in, so the tracker and server
+    threads are sampled through `sys._current_frames` instead, which costs them
+    nothing. For every thread name the functions seen most often on top of the stack
+    (``self``) and anywhere in it (``total``) are reported. Raises ValueError unless
+    `duration` is a finite number.
+    """
+    if not math.isfinite(duration):
+        raise ValueError(f"Invalid duration: {duration}")
+    own = threading.get_ident()
+    samples = Counter()
+    self_counts = defaultdict(Counter)
+    total_counts = defaultdict(Counter)
+    end = time.monotonic() + duration
+    while True:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            name = names.get(ident, str(ident))
+            samples[name] += 1
+            self_counts[name][describe_code(frame.f_code)] += 1
+            seen = set()
+            while frame is not None:
+                function = describe_code(frame.f_code)
+                if function not in seen:  # Count recursive functions once per sample
+                    seen.add(function)
+                    total_counts[name][function] += 1
+                frame = frame.f_back
+        if time.monotonic() >= end:
+            break
+        time.sleep(interval)
+
+    def ranking(counts, count):
+        return [{'function': function, 'samples': n, 'percent': round(100 * n / count, 1)}
+                for function, n in counts.most_common(top)]
+
+    return {
+        'duration': duration,
+        'interval': interval,
+        'threads': {name: {'samples': count,
+                           'self': ranking(self_counts[name], count),
+                           'total': ranking(total_counts[name], count)}
+                    for name, count in samples.items()}
+    }
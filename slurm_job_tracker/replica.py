@@ -0,0 +1,158 @@
+import datetime
+import os
+import threading
+
+from .config import SNAPSHOT_FILE
+from .hostlist import NodeIndex
+from .output import OutputReader
+from .snapshot import COMPLETED, RUNNING, SnapshotReader
+
+# Commands answered by replicas
+REPLICA_COMMANDS = ('get_status', 'get_queue', 'get_info')
+
+
+class SnapshotView:
+    """The decoded job lists and node index of one snapshot version, built on first use."""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self._running_jobs = None
+        self._completed_jobs = None
+        self._nodes = None
+
+    @property
+    def running_jobs(self):
+        if self._running_jobs is None:
+            self._running_jobs = self.reader.jobs(RUNNING)
+        return self._running_jobs
+
+    @property
+    def completed_jobs(self):
+        if self._completed_jobs is None:
+            self._completed_jobs = self.reader.jobs(COMPLETED)
+        return self._completed_jobs
+
+    @property
+    def nodes(self):
+        if self._nodes is None:
+            nodes = NodeIndex()
+            for job_id, job_info in self.running_jobs.items():
+                try:
+                    nodes.update(job_id, job_info.get('nodelist'))
+                except ValueError:
+                    pass  # Logged by the tracker
+            self._nodes = nodes
+        return self._nodes
+
+
+class ReplicaTracker:
+    """
+    Serve the read-only commands of a tracker from the snapshot it publishes.
+
+    A replica runs in its own process and never touches the tracking loop or its lock.
+    It maps the newest snapshot file, switching to a new version as soon as the
+    tracker has renamed it over the previous one, and answers `get_status`, `get_queue`
+    and `get_info`. Single jobs (`get_status` with `job_id`) are looked up in the
+    snapshot's index; the full job lists and the node index are decoded once per
+    snapshot version. Any number of replicas can serve the same snapshot.
+
+    The replica provides the parts of the `SlurmJobTracker` interface used by
+    `CommandHandler` (`handle_command`, `lock`, `output`, `job_files` and
+    `find_output_file`), so it is served by the same HTTP handler.
+
+    Attributes:
+        snapshot_file (str): Path of the snapshot published by the tracker.
+        lock (threading.Lock): Lock taken by the HTTP handler around tracker access.
+        output (OutputReader): Reads the output files of jobs.
+    """
+
+    def __init__(self, snapshot_file=SNAPSHOT_FILE):
+        self.snapshot_file = snapshot_file
+        self.lock = threading.Lock()
+        self.output = OutputReader()
+        self.reload_lock = threading.Lock()
+        self.file_id = None
+        self.view = None
+
+    def snapshot(self):
+        """Return the view of the newest snapshot, or None if none was published yet."""
+        try:
+            stat = os.stat(self.snapshot_file)
+        except FileNotFoundError:
+            return None
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self.reload_lock:
+            if file_id != self.file_id:
+                # Readers of the previous version keep their mapping until they are done
+                self.view = SnapshotView(SnapshotReader(self.snapshot_file))
+                self.file_id = file_id
+            return self.view
+
+    @property
+    def job_files(self):
+        view = self.snapshot()
+        return view.running_jobs if view is not None else {}
+
+    def find_output_file(self, job_id):
+        """Return the path of the output file of a running or completed job, or None."""
+        view = self.snapshot()
+        found = view.reader.get(job_id) if view is not None else None
+        if found is None or not found[1].get('directory') or not found[1].get('filename'):
+            return None
+        return os.path.join(found[1]['directory'], found[1]['filename'])
+
+    def get_status(self, view, args):
+        if args.get('job_id') is not None:
+            job_id = str(args['job_id'])
+            found = view.reader.get(job_id)
+            running_jobs, completed_jobs = {}, {}
+            if found is not None:
+                (running_jobs if found[0] == RUNNING else completed_jobs)[job_id] = found[1]
+            return {
+                'status': 'Status retrieved',
+                'timestamp': str(datetime.datetime.now()),
+                'running_jobs': running_jobs,
+                'completed_jobs': completed_jobs
+            }
+        if args.get('nodes') or args.get('state'):
+            try:
+                running_jobs = view.nodes.select(view.running_jobs, args.get('nodes'), args.get('state'))
+            except ValueError as e:
+                return {
+                    'status': 'Invalid hostlist',
+                    'timestamp': str(datetime.datetime.now()),
+                    'error': str(e)
+                }
+            return {
+                'status': 'Status retrieved',
+                'timestamp': str(datetime.datetime.now()),
+                'running_jobs': running_jobs
+            }
+        return {
+            'status': 'Status retrieved',
+            'timestamp': str(datetime.datetime.now()),
+            'running_jobs': view.running_jobs,
+            'completed_jobs': view.completed_jobs
+        }
+
+    def handle_command(self, command):
+        """Handle a read-only command from the snapshot."""
+        name = command.get('command')
+        if name not in REPLICA_COMMANDS:
+            return {'status': 'Command not available on a replica', 'command': name}
+        view = self.snapshot()
+        if view is None:
+            return {'status': 'Snapshot not available', 'timestamp': str(datetime.datetime.now())}
+
+        meta = view.reader.meta
+        if name == 'get_status':
+            return self.get_status(view, command.get('args', {}))
+        if name == 'get_queue':
+            return {'status': 'Queue retrieved', 'timestamp': str(datetime.datetime.now()), **meta['queue']}
+        return {
+            'status': 'OK',
+            'timestamp': str(datetime.datetime.now()),
+            **meta['info'],
+            'snapshot_version': view.reader.version,
+            'snapshot_timestamp': meta['timestamp']
+        }
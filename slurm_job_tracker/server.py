@@ -1,9 +1,19 @@
 import json
 import logging
+import os
+import socket
+import stat
+import struct
 import threading
+import time
 from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import parse_qs, urlparse
 
-from .config import SECRET_TOKEN, SERVER_HOST, SERVER_PORT, mask_token
+from .commands import READ_ONLY_COMMANDS
+from .config import (OUTPUT_POLL_INTERVAL, OUTPUT_TAIL_LINES, REPLICA_PORT, SERVER_HOST, SERVER_PORT,
+                     get_secret_token, get_server_tcp, get_socket_path, mask_token)
+from .encoding import compute_etag, encode_response
 from .tracker import SlurmJobTracker
 
 
@@ -17,36 +27,56 @@ class CommandHandler(BaseHTTPRequestHandler):
             processes incoming commands, and returns appropriate responses.
 
             - Logs received headers with masked Authorization token.
-            - Verifies the presence and correctness of the SECRET_TOKEN.
+            - On a Unix socket, verifies that the peer runs as the same user (403 otherwise).
+            - Otherwise verifies the presence and correctness of the SECRET_TOKEN.
             - Responds with 500 if SECRET_TOKEN is not set.
             - Responds with 401 if the Authorization header is missing or incorrect.
             - Processes the incoming command if authorized and returns the response.
             - Responds with 400 if the incoming data is not valid JSON.
+            - Responds with 304 if a read-only command's result matches the If-None-Match ETag.
+
+        do_GET(self):
+            Streams the output file of a job from `/output/<job_id>?lines=N` or
+            `/output/<job_id>?offset=N` using chunked transfer encoding, following the
+            file until the job is no longer running.
+
+        stream_output(self, job_id, lines, offset), write_chunk(self, data):
+            Follow an output file and write it as chunks of the response.
+
+        check_access(self):
+            Authorizes a request by peer uid on the Unix socket or by bearer token otherwise.
+
+        authorized(self):
+            Checks the bearer token of a TCP request.
+
+        send_body(self, status, body):
+            Sends a response with a Content-Length header so the connection can be kept alive.
+
+        send_command_response(self, command, response):
+            Sends a command response encoded as negotiated with the client.
     """
 
+    protocol_version = "HTTP/1.1"
+
+    def send_body(self, status, body, headers=None):
+        """Send a complete response; error responses close the connection."""
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if status >= 400:
+            # The request body may not have been read, so the connection cannot be reused.
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
     def do_POST(self):
         masked_headers = {key: (f"Bearer {mask_token(value.split()[-1])}" if key == "Authorization" else value)
                           for key, value in self.headers.items()}
         logging.info(f"Received headers (masked): {masked_headers}")
 
-        # Check the Authorization header
-        auth_header = self.headers.get('Authorization')
-        masked_auth_header = f"Bearer {mask_token(auth_header.split()[-1])}" if auth_header else "None"
-        logging.info(
-            f"Authorization header received (masked): {masked_auth_header}")
-
-        if not SECRET_TOKEN:
-            logging.error("SECRET_TOKEN is not set on the server!")
-            self.send_response(500)  # Internal Server Error
-            self.end_headers()
-            self.wfile.write(b"Server misconfigured: SECRET_TOKEN is not set.")
-            return
-
-        if not auth_header or auth_header != f"Bearer {SECRET_TOKEN}":
-            logging.warning("Unauthorized access attempt detected!")
-            self.send_response(401)  # Unauthorized
-            self.end_headers()
-            self.wfile.write(b"Unauthorized")
+        if not self.check_access():
             return
 
         # Process incoming command
@@ -58,31 +88,221 @@ class CommandHandler(BaseHTTPRequestHandler):
             response = self.server.tracker.handle_command(command)
             logging.info(f"Response: {response}")
             if response is None:
-                self.send_response(400)  # Bad Request
-                self.end_headers()
-                self.wfile.write(b"Invalid command")
+                self.send_body(400, b"Invalid command")  # Bad Request
                 return
-            
-            self.send_response(200)
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
+
+            self.send_command_response(command, response)
         except json.JSONDecodeError:
-            self.send_response(400)  # Bad Request
-            self.end_headers()
-            self.wfile.write(b"Invalid JSON")
+            self.send_body(400, b"Invalid JSON")  # Bad Request
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'output':
+            self.send_body(404, b"Not found")  # Not Found
+            return
+
+        if not self.check_access():
+            return
+
+        query = parse_qs(url.query)
+        try:
+            lines = int(query.get('lines', [OUTPUT_TAIL_LINES])[0])
+            offset = int(query['offset'][0]) if 'offset' in query else None
+        except ValueError:
+            self.send_body(400, b"Invalid query")  # Bad Request
+            return
+        self.stream_output(parts[1], lines, offset)
+
+    def stream_output(self, job_id, lines, offset):
+        """Send the output of a job as a chunked stream while the job is running."""
+        tracker = self.server.tracker
+        with tracker.lock:
+            path = tracker.find_output_file(job_id)
+        if path is None or not os.path.isfile(path):
+            self.send_body(404, b"Output not found")  # Not Found
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            if offset is None:
+                data, _, offset = tracker.output.tail(path, lines)
+                self.write_chunk(data)
+            while True:
+                data, offset, _ = tracker.output.read(path, offset)
+                if data:
+                    self.write_chunk(data)
+                    offset += len(data)
+                    continue
+                with tracker.lock:
+                    running = job_id in tracker.job_files
+                if not running:
+                    break
+                time.sleep(OUTPUT_POLL_INTERVAL)
+            self.wfile.write(b"0\r\n\r\n")  # Last chunk
+        except (BrokenPipeError, ConnectionResetError):
+            logging.info(f"Client stopped following the output of job {job_id}.")
+            self.close_connection = True
+
+    def write_chunk(self, data):
+        """Write one chunk of a chunked response."""
+        if data:
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    def check_access(self):
+        """Authorize the request, sending an error response if access is denied."""
+        if isinstance(self.server, UnixHTTPServer):
+            # Local connections are authorized by the socket permissions and the peer's uid
+            if not self.server.peer_allowed(self.request):
+                logging.warning(
+                    "Connection from another user rejected on the Unix socket!")
+                self.send_body(403, b"Forbidden")  # Forbidden
+                return False
+            return True
+        return self.authorized()
+
+    def send_command_response(self, command, response):
+        """
+        Send a command response using the encoding negotiated through the Accept and
+        Accept-Encoding headers. Read-only commands carry an ETag, and an unchanged
+        result is answered with 304 Not Modified.
+        """
+        headers = {'Vary': 'Accept, Accept-Encoding'}
+        if command.get('command') in READ_ONLY_COMMANDS:
+            etag = compute_etag(response)
+            headers['ETag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                self.send_body(304, b"", headers)
+                return
+
+        body, content_type, content_encoding = encode_response(
+            response, self.headers.get('Accept'), self.headers.get('Accept-Encoding'))
+        headers['Content-Type'] = content_type
+        if content_encoding:
+            headers['Content-Encoding'] = content_encoding
+        self.send_body(200, body, headers)
+
+    def authorized(self):
+        """Check the bearer token, sending an error response if the request is not authorized."""
+        # Check the Authorization header
+        auth_header = self.headers.get('Authorization')
+        masked_auth_header = f"Bearer {mask_token(auth_header.split()[-1])}" if auth_header else "None"
+        logging.info(
+            f"Authorization header received (masked): {masked_auth_header}")
+
+        secret_token = get_secret_token()
+        if not secret_token:
+            logging.error("SECRET_TOKEN is not set on the server!")
+            self.send_body(500, b"Server misconfigured: SECRET_TOKEN is not set.")  # Internal Server Error
+            return False
+
+        if not auth_header or auth_header != f"Bearer {secret_token}":
+            logging.warning("Unauthorized access attempt detected!")
+            self.send_body(401, b"Unauthorized")  # Unauthorized
+            return False
 
+        return True
 
-class ThreadedHTTPServer(HTTPServer):
-    """HTTP server that handles requests in a separate thread."""
+
+class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
+    """HTTP server that handles each connection in a separate thread."""
+
+    daemon_threads = True
 
     def __init__(self, server_address, RequestHandlerClass, tracker):
         super().__init__(server_address, RequestHandlerClass)
         self.tracker = tracker
 
 
+class ReplicaHTTPServer(ThreadedHTTPServer):
+    """
+    HTTP server of a read-only replica.
+
+    The port is bound with SO_REUSEPORT where available, so several replica processes
+    can listen on the same port and the kernel spreads connections between them.
+    """
+
+    def server_bind(self):
+        if hasattr(socket, 'SO_REUSEPORT'):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """
+    HTTP server listening on a Unix domain socket.
+
+    The socket file is only accessible to its owner, and on Linux the uid of every
+    connecting process is checked as well, so no bearer token is required.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, RequestHandlerClass, tracker):
+        self.socket_path = socket_path
+        self.tracker = tracker
+        if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.unlink(socket_path)  # Left over from a previous run
+        super().__init__(socket_path, RequestHandlerClass)
+
+    def server_bind(self):
+        super().server_bind()
+        os.chmod(self.socket_path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # Unix peers have no address; BaseHTTPRequestHandler logs client_address[0]
+        return request, (self.socket_path, 0)
+
+    @staticmethod
+    def peer_allowed(request):
+        """Check that the connecting process belongs to the user running the server."""
+        if not hasattr(socket, 'SO_PEERCRED'):
+            return True  # Rely on the socket file permissions
+        credentials = request.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        _, uid, _ = struct.unpack('3i', credentials)
+        return uid == os.getuid()
+
+
+def run_unix_server(tracker, socket_path=None):
+    """Start the HTTP server on a Unix domain socket."""
+    socket_path = socket_path or get_socket_path()
+    httpd = UnixHTTPServer(socket_path, CommandHandler, tracker)
+    logging.info(f"Server running on unix://{socket_path}")
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
+
+
 def run_server(tracker):
-    """Start the HTTP server."""
+    """Start the HTTP server, and the Unix socket server if SOCKET_PATH is set."""
+    if get_socket_path():
+        if not get_server_tcp():
+            run_unix_server(tracker)
+            return
+        unix_thread = threading.Thread(
+            target=run_unix_server, args=(tracker,), daemon=True)
+        unix_thread.start()
+
     server_address = (SERVER_HOST, SERVER_PORT)
     httpd = ThreadedHTTPServer(server_address, CommandHandler, tracker)
     logging.info(f"Server running on http://{SERVER_HOST}:{SERVER_PORT}")
     httpd.serve_forever()
+
+
+def run_replica(replica, port=REPLICA_PORT):
+    """Start the HTTP server of a read-only replica."""
+    httpd = ReplicaHTTPServer((SERVER_HOST, port), CommandHandler, replica)
+    logging.info(f"Replica running on http://{SERVER_HOST}:{port}")
+    httpd.serve_forever()
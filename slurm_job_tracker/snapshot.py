@@ -0,0 +1,154 @@
+import json
+import logging
+import mmap
+import os
+import struct
+
+from .config import SNAPSHOT_FILE
+
+MAGIC = b'SJTS'
+FORMAT_VERSION = 1
+# magic, format version, snapshot version, meta length, number of index entries
+HEADER = struct.Struct('<4sHQII')
+JOB_ID_SIZE = 32
+# job id (NUL padded), kind, record offset from the start of the records, record length
+INDEX_ENTRY = struct.Struct(f'<{JOB_ID_SIZE}sBQI')
+RUNNING, COMPLETED = 0, 1
+
+
+class SnapshotWriter:
+    """
+    Publish the tracker state as an immutable, versioned snapshot file.
+
+    The file holds a header, a JSON meta section (tracker info and queue), an index of
+    fixed-size entries sorted by job id and the JSON records of the running and
+    completed jobs. Every snapshot is written to a temporary file and renamed over the
+    previous one, so readers that mapped an older version keep a consistent view.
+    Job records are replaced rather than modified by the tracker, so the encoding of
+    a record is reused for as long as the same object is published.
+
+    Attributes:
+        path (str): Path of the snapshot file.
+        version (int): Version of the last published snapshot, continued across restarts.
+    """
+
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.path = path
+        self.version = 0
+        self.encoded = {}  # (kind, job_id) -> (record, encoded record)
+        try:
+            with open(path, 'rb') as f:
+                magic, _, version, _, _ = HEADER.unpack(f.read(HEADER.size))
+            if magic == MAGIC:
+                self.version = version
+        except (OSError, struct.error):
+            pass
+
+    def encode(self, kind, job_id, record):
+        cached = self.encoded.get((kind, job_id))
+        if cached is not None and cached[0] is record:
+            return cached[1]
+        data = json.dumps(record, separators=(',', ':'), default=str).encode()
+        self.encoded[(kind, job_id)] = (record, data)
+        return data
+
+    def publish(self, running_jobs, completed_jobs, meta):
+        """Write a new snapshot version and return its number."""
+        entries = []
+        records = []
+        offset = 0
+        used = set()
+        for kind, jobs in ((RUNNING, running_jobs), (COMPLETED, completed_jobs)):
+            for job_id, record in jobs.items():
+                key = job_id.encode()
+                if len(key) > JOB_ID_SIZE:
+                    logging.warning(f"Job id {job_id} is too long for the snapshot index, skipping.")
+                    continue
+                data = self.encode(kind, job_id, record)
+                used.add((kind, job_id))
+                entries.append((key, kind, offset, len(data)))
+                records.append(data)
+                offset += len(data)
+        # Forget the encodings of jobs that were dropped
+        for key in self.encoded.keys() - used:
+            del self.encoded[key]
+        entries.sort()
+
+        meta_data = json.dumps(meta, separators=(',', ':'), default=str).encode()
+        self.version += 1
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.version, len(meta_data), len(entries)))
+            f.write(meta_data)
+            f.write(b''.join(INDEX_ENTRY.pack(*entry) for entry in entries))
+            f.write(b''.join(records))
+        os.replace(tmp_path, self.path)
+        return self.version
+
+
+class SnapshotReader:
+    """
+    Read a snapshot file through a read-only memory map.
+
+    Single jobs are found by binary search over the index and decoded on their own;
+    the meta section is decoded when the snapshot is opened.
+
+    Attributes:
+        version (int): Version of the snapshot.
+        meta (dict): Tracker information published with the snapshot.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, format_version, self.version, meta_length, self.count = HEADER.unpack_from(self.map)
+            if magic != MAGIC or format_version != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a snapshot file of format {FORMAT_VERSION}.")
+        except (struct.error, ValueError):
+            self.map.close()
+            raise
+        self.meta = json.loads(self.map[HEADER.size:HEADER.size + meta_length])
+        self.index_start = HEADER.size + meta_length
+        self.records_start = self.index_start + self.count * INDEX_ENTRY.size
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.map.close()
+
+    def entry(self, i):
+        """Return ``(job_id, kind, offset, length)`` of index entry `i`."""
+        key, kind, offset, length = INDEX_ENTRY.unpack_from(self.map, self.index_start + i * INDEX_ENTRY.size)
+        return key.rstrip(b'\0').decode(), kind, offset, length
+
+    def record(self, offset, length):
+        start = self.records_start + offset
+        return json.loads(self.map[start:start + length])
+
+    def get(self, job_id):
+        """Return ``(kind, record)`` of a job, preferring its running record, or None if unknown."""
+        key = job_id.encode()
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            position = self.index_start + middle * INDEX_ENTRY.size
+            if self.map[position:position + JOB_ID_SIZE].rstrip(b'\0') < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count:
+            found_id, kind, offset, length = self.entry(low)
+            if found_id == job_id:
+                return kind, self.record(offset, length)
+        return None
+
+    def jobs(self, kind):
+        """Decode all jobs of one kind, keyed by job id."""
+        jobs = {}
+        for i in range(self.count):
+            job_id, entry_kind, offset, length = self.entry(i)
+            if entry_kind == kind:
+                jobs[job_id] = self.record(offset, length)
+        return jobs
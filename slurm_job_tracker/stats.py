@@ -0,0 +1,175 @@
+import datetime
+import math
+from collections import deque
+
+from .config import MIN_RUNTIME_SAMPLES, STATS_RECORDED_IDS, STATS_SAMPLE_SIZE, STATS_WINDOW
+from .utils import parse_timestamp
+
+
+class RuntimeAggregate:
+    """
+    Streaming aggregate of job runtimes in constant memory.
+
+    Count, mean and variance are maintained with Welford's algorithm and minimum and
+    maximum are exact. Percentiles are computed over a sliding window of the most
+    recent `sample_size` runtimes, which is sorted once after it changed.
+    """
+
+    def __init__(self, sample_size=STATS_SAMPLE_SIZE):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+        self.samples = deque(maxlen=sample_size)
+        self._sorted = None
+
+    def add(self, runtime):
+        """Add a runtime in seconds to the aggregate."""
+        self.count += 1
+        delta = runtime - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (runtime - self.mean)
+        if self.min is None or runtime < self.min:
+            self.min = runtime
+        if self.max is None or runtime > self.max:
+            self.max = runtime
+        self.samples.append(runtime)
+        self._sorted = None
+
+    @property
+    def stdev(self):
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def percentile(self, p):
+        """Return the `p`-th percentile (0-100) of the recent runtimes using linear interpolation."""
+        if not self.samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self.samples)
+        samples = self._sorted
+        rank = (len(samples) - 1) * p / 100
+        lower = math.floor(rank)
+        upper = math.ceil(rank)
+        return samples[lower] + (samples[upper] - samples[lower]) * (rank - lower)
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'stdev': self.stdev,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+        }
+
+
+class JobStatistics:
+    """
+    Incremental runtime statistics over the completed job history.
+
+    Jobs are recorded once as they finish; aggregates are kept overall, per directory
+    and per submission script, together with a sliding window of completion times used
+    to compute throughput and queue drain estimates. Memory does not grow with the
+    history: percentiles use the most recent runtimes, and only the ids of the last
+    `recorded_ids` jobs are remembered to skip duplicates.
+
+    Attributes:
+        window (int): Length of the throughput window in seconds.
+        min_samples (int): Minimum number of finished jobs needed for a runtime estimate.
+        overall (RuntimeAggregate): Runtimes of all recorded jobs.
+        by_directory (dict): Runtime aggregates keyed by working directory.
+        by_script (dict): Runtime aggregates keyed by submission script name.
+    """
+
+    def __init__(self, window=STATS_WINDOW, min_samples=MIN_RUNTIME_SAMPLES, recorded_ids=STATS_RECORDED_IDS):
+        self.window = window
+        self.min_samples = min_samples
+        self.overall = RuntimeAggregate()
+        self.by_directory = {}
+        self.by_script = {}
+        self.recorded = set()
+        self.recorded_order = deque(maxlen=recorded_ids)
+        self.recent_ends = deque()
+
+    def load(self, completed_jobs, now=None):
+        """Record every job of an existing history."""
+        for job_id, job_info in completed_jobs.items():
+            self.record(job_id, job_info)
+        cutoff = (now or datetime.datetime.now()) - datetime.timedelta(seconds=self.window)
+        self.recent_ends = deque(sorted(end for end in self.recent_ends if end >= cutoff))
+
+    def record(self, job_id, job_info):
+        """Add a finished job to the aggregates. Jobs without valid times are ignored."""
+        if job_id in self.recorded:
+            return
+        start = parse_timestamp(job_info.get('start_time'))
+        end = parse_timestamp(job_info.get('end_time'))
+        if start is None or end is None or end < start:
+            return
+
+        if len(self.recorded_order) == self.recorded_order.maxlen:
+            self.recorded.discard(self.recorded_order[0])
+        self.recorded_order.append(job_id)
+        self.recorded.add(job_id)
+        runtime = (end - start).total_seconds()
+        self.overall.add(runtime)
+        for groups, key in ((self.by_directory, job_info.get('directory')),
+                            (self.by_script, job_info.get('script_name'))):
+            if key is not None:
+                aggregate = groups.get(key)
+                if aggregate is None:
+                    aggregate = groups[key] = RuntimeAggregate()
+                aggregate.add(runtime)
+        self.recent_ends.append(end)
+
+    def expected_runtime(self, directory=None):
+        """Median runtime for `directory`, falling back to all jobs, or None without enough samples."""
+        aggregate = self.by_directory.get(directory)
+        if aggregate is not None and aggregate.count >= self.min_samples:
+            return aggregate.percentile(50)
+        if self.overall.count >= self.min_samples:
+            return self.overall.percentile(50)
+        return None
+
+    def throughput(self, now=None):
+        """Return the number of jobs finished per hour within the sliding window."""
+        now = now or datetime.datetime.now()
+        cutoff = now - datetime.timedelta(seconds=self.window)
+        while self.recent_ends and self.recent_ends[0] < cutoff:
+            self.recent_ends.popleft()
+        return len(self.recent_ends) * 3600 / self.window
+
+    def eta(self, queue_size, max_jobs, now=None):
+        """
+        Estimate the seconds needed to drain `queue_size` queued tasks.
+
+        Uses the recent throughput when jobs have finished within the window, otherwise
+        assumes the queue is processed in waves of `max_jobs` jobs of median runtime.
+        """
+        if queue_size == 0:
+            return 0.0
+        throughput = self.throughput(now)
+        if throughput > 0:
+            return queue_size * 3600 / throughput
+        runtime = self.expected_runtime()
+        if runtime is None or max_jobs <= 0:
+            return None
+        return math.ceil(queue_size / max_jobs) * runtime
+
+    def summary(self, queue_size=0, max_jobs=0, now=None):
+        """Return all statistics as a JSON serialisable dict."""
+        now = now or datetime.datetime.now()
+        eta_seconds = self.eta(queue_size, max_jobs, now)
+        return {
+            'runtime': self.overall.to_dict(),
+            'by_directory': {directory: aggregate.to_dict() for directory, aggregate in self.by_directory.items()},
+            'by_script': {script: aggregate.to_dict() for script, aggregate in self.by_script.items()},
+            'throughput_per_hour': self.throughput(now),
+            'throughput_window': self.window,
+            'queue_size': queue_size,
+            'queue_eta_seconds': eta_seconds,
+            'queue_eta': str(now + datetime.timedelta(seconds=eta_seconds)) if eta_seconds is not None else None,
+        }
@@ -0,0 +1,182 @@
+import codecs
+import http.client
+import json
+import logging
+import os
+import socket
+import time
+
+from .commands import CACHED_COMMANDS, ResponseCache, TrackerCommands
+from .config import (CLIENT_BACKOFF, CLIENT_RETRIES, CLIENT_TIMEOUT, OUTPUT_TAIL_LINES, SERVER_HOST, SERVER_PORT,
+                     get_secret_token, get_socket_path)
+
+RETRY_STATUSES = (502, 503, 504)
+CHUNK_SIZE = 65536
+
+
+class UnixHTTPClientConnection(http.client.HTTPConnection):
+    """`http.client` connection to a server listening on a Unix domain socket."""
+
+    def __init__(self, socket_path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class StdlibSlurmJobTrackerClient(TrackerCommands):
+    """
+    Client to communicate with the Slurm Job Tracker server using only `http.client`.
+
+    It offers the same commands as `SlurmJobTrackerClient` without importing requests
+    or urllib3, which take most of the start-up time of a short-lived process such as
+    `slurm-client`. One keep-alive connection is reused between commands. Failed
+    connection attempts and 502/503/504 responses are retried with exponential backoff;
+    requests are never resent after they may have reached the server, except when a
+    kept-alive connection turned out to be closed by the server.
+
+    Responses are requested as gzip compressed JSON and read-only command results are
+    cached with their ETag, as in `SlurmJobTrackerClient`. The token is only looked up
+    when the client connects over TCP.
+    """
+
+    def __init__(self, server_host=SERVER_HOST, server_port=SERVER_PORT, secret_token=None,
+                 timeout=CLIENT_TIMEOUT, retries=CLIENT_RETRIES, backoff_factor=CLIENT_BACKOFF, socket_path=None):
+        socket_path = get_socket_path() if socket_path is None else socket_path
+        self.socket_path = socket_path if socket_path and os.path.exists(
+            socket_path) else None
+        self.server_host = server_host
+        self.server_port = server_port
+        self.headers = {'Content-Type': 'application/json',
+                        'Accept': 'application/json',
+                        'Accept-Encoding': 'gzip'}
+        if not self.socket_path:
+            secret_token = get_secret_token() if secret_token is None else secret_token
+            if secret_token:
+                self.headers['Authorization'] = f"Bearer {secret_token}"
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.cache = ResponseCache()
+        self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the connection."""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def connect(self):
+        """Open a new connection, retrying failed attempts with exponential backoff."""
+        for attempt in range(self.retries + 1):
+            if self.socket_path:
+                connection = UnixHTTPClientConnection(
+                    self.socket_path, timeout=self.timeout)
+            else:
+                connection = http.client.HTTPConnection(
+                    self.server_host, self.server_port, timeout=self.timeout)
+            try:
+                connection.connect()
+                return connection
+            except OSError:
+                connection.close()
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff_factor * 2 ** attempt)
+
+    def request(self, method, path, body=None, headers=None, timeout=None):
+        """Send a request and return the response, whose body must be read before the next request."""
+        headers = dict(self.headers, **(headers or {}))
+        attempt = 0
+        while True:
+            reused = self.connection is not None
+            if not reused:
+                self.connection = self.connect()
+            try:
+                self.connection.sock.settimeout(timeout or self.timeout)
+                self.connection.request(
+                    method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.close()
+                if reused:
+                    continue  # The server closed the idle connection, the request was not processed
+                raise
+            except Exception:
+                self.close()
+                raise
+
+            if response.status in RETRY_STATUSES and attempt < self.retries:
+                self.read_body(response)
+                time.sleep(self.backoff_factor * 2 ** attempt)
+                attempt += 1
+                continue
+            return response
+
+    def read_body(self, response):
+        """Read and decompress a response body, closing the connection if the server requested it."""
+        body = response.read()
+        if response.will_close:
+            self.close()
+        if response.getheader('Content-Encoding') == 'gzip':
+            import gzip  # Only large responses are compressed
+            body = gzip.decompress(body)
+        return body
+
+    def send_command(self, command, timeout=None):
+        """Send a generic command to the server, waiting `timeout` seconds instead of the default."""
+        data = json.dumps(command)
+        cacheable = command.get('command') in CACHED_COMMANDS
+        cached = self.cache.get(data) if cacheable else None
+        try:
+            response = self.request('POST', '/', data.encode(),
+                                    {'If-None-Match': cached[0]} if cached else None, timeout)
+            body = self.read_body(response)
+            if response.status == 304 and cached:
+                return cached[1]
+            if response.status >= 400:
+                raise http.client.HTTPException(
+                    f"{response.status} {response.reason}: {body.decode(errors='replace')}")
+            result = json.loads(body)
+            etag = response.getheader('ETag')
+            if etag and cacheable:
+                self.cache.put(data, etag, result)
+            return result
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            logging.error(f"Error communicating with server: {e}")
+            return None
+
+    def follow_output(self, job_id, lines=OUTPUT_TAIL_LINES):
+        """Yield the last lines of a job's output, then new output until the job ends."""
+        try:
+            response = self.request('GET', f"/output/{job_id}?lines={lines}")
+            if response.status >= 400:
+                body = self.read_body(response)
+                raise http.client.HTTPException(
+                    f"{response.status} {response.reason}: {body.decode(errors='replace')}")
+            self.connection.sock.settimeout(None)  # The job may not write output for a long time
+            # Chunks may split multi-byte characters
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            while True:
+                chunk = response.read1(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield decoder.decode(chunk)
+        except (OSError, http.client.HTTPException) as e:
+            logging.error(f"Error communicating with server: {e}")
+        finally:
+            self.close()
@@ -0,0 +1,97 @@
+import datetime
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+
+from .config import IDEMPOTENCY_TTL, SUBMIT_RETRY_DELAY, SUBMIT_RETRY_MAX_DELAY
+
+
+class RetryQueue:
+    """
+    Delayed queue of tasks whose submission failed.
+
+    Tasks wait in a heap ordered by the time of their next attempt, so a failing task
+    never blocks the head of the submission queue. The delay doubles with every attempt.
+
+    Attributes:
+        base_delay (float): Delay in seconds before the first retry.
+        max_delay (float): Upper bound of the delay in seconds.
+    """
+
+    def __init__(self, base_delay=SUBMIT_RETRY_DELAY, max_delay=SUBMIT_RETRY_MAX_DELAY):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.heap = []
+        self.counter = itertools.count()  # Keeps tasks with equal times in FIFO order
+
+    def __len__(self):
+        return len(self.heap)
+
+    def delay(self, attempt):
+        """Return the delay in seconds before retry number `attempt` (starting at 1)."""
+        return min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+
+    def push(self, task, attempt, now=None):
+        """Schedule `task` for retry number `attempt` and return the delay."""
+        now = now if now is not None else time.time()
+        delay = self.delay(attempt)
+        heapq.heappush(self.heap, (now + delay, next(self.counter), task))
+        return delay
+
+    def pop_due(self, now=None):
+        """Remove and return all tasks whose retry time has come."""
+        now = now if now is not None else time.time()
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            due.append(heapq.heappop(self.heap)[2])
+        return due
+
+    def tasks(self):
+        """Return ``(retry_time, task)`` pairs in retry order."""
+        return [(retry_time, task) for retry_time, _, task in sorted(self.heap)]
+
+
+class IdempotencyIndex:
+    """
+    Index of client supplied idempotency keys.
+
+    Every key maps to the record of the task it submitted, so a repeated `submit_task`
+    with the same key is answered from the index instead of queuing a duplicate. Keys
+    expire after `ttl` seconds.
+    """
+
+    def __init__(self, ttl=IDEMPOTENCY_TTL):
+        self.ttl = ttl
+        self.records = OrderedDict()
+
+    def expire(self, now=None):
+        """Drop keys older than the time to live."""
+        now = now if now is not None else time.time()
+        while self.records:
+            key, record = next(iter(self.records.items()))
+            if now - record['created'] < self.ttl:
+                break
+            del self.records[key]
+
+    def get(self, key):
+        """Return the record of `key`, or None if it is unknown or expired."""
+        self.expire()
+        return self.records.get(key)
+
+    def add(self, key, working_dir, script_name):
+        """Register a new key for a queued task."""
+        self.expire()
+        self.records[key] = {
+            'created': time.time(),
+            'queued_at': str(datetime.datetime.now()),
+            'state': 'queued',
+            'working_dir': working_dir,
+            'script_name': script_name,
+            'job_id': None,
+        }
+
+    def update(self, key, **fields):
+        """Update the record of `key` after a submission attempt."""
+        if key in self.records:
+            self.records[key].update(fields)
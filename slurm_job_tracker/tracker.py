@@ -1,6 +1,7 @@
 import datetime
 import json
 import logging
+import math
 import os
 import re
 import subprocess
@@ -9,7 +10,18 @@ import time
 from datetime import timedelta
 from queue import Queue
 
-from .config import CURRENT_FILE, HISTORY_FILE, MAX_JOBS, TRACKER_INTERVAL
+from .accounting import SacctReconciler
+from .config import (CURRENT_FILE, HISTORY_FILE, MAX_JOBS, MAX_RESUBMITS, OUTPUT_TAIL_LINES, PROFILE_MAX_DURATION,
+                     RESUBMIT_STATES, SNAPSHOT_FILE, SUBMIT_RETRIES, TRACKER_INTERVAL)
+from .delta import diff_jobs
+from .governor import SubmissionGovernor
+from .hostlist import NodeIndex
+from .output import OutputReader
+from .profiling import TickTracer, sample_stacks
+from .snapshot import SnapshotWriter
+from .submission import IdempotencyIndex, RetryQueue
+from .workflow import UNKNOWN_STATE, WorkflowManager
+from .stats import JobStatistics
 from .utils import setup_logging
 
 
@@ -26,6 +38,21 @@ class SlurmJobTracker:
         job_files (dict): Dictionary to store current job information.
         submission_queue (Queue): Queue to manage job submissions.
         lock (threading.Lock): Lock to ensure thread safety.
+        governor (SubmissionGovernor): Decides how many queued tasks can be submitted per tick.
+        stats (JobStatistics): Runtime statistics of completed jobs, updated as jobs finish.
+        reconciler (SacctReconciler): Enriches completed jobs with accounting data from sacct.
+        output (OutputReader): Reads the end or byte ranges of job output files.
+        workflows (WorkflowManager): Releases the tasks of dependency graphs onto the submission queue.
+        submit_retries (int): Number of retries of a failed sbatch call.
+        max_resubmits (int): Default number of resubmissions of jobs ending in a failure state.
+        retries (RetryQueue): Tasks waiting for another submission attempt.
+        idempotency (IdempotencyIndex): Tasks submitted with an idempotency key.
+        job_options (dict): Queue options of the submitted jobs keyed by job id.
+        nodes (NodeIndex): Ids of the tracked jobs keyed by the nodes they run on.
+        tracer (TickTracer): Span traces of the most recent ticks.
+        snapshots (SnapshotWriter or None): Publishes the state after ticks that changed it, for read-only replicas.
+        changes (int): Counter of queue, retry and submission changes, bumped under the lock.
+        published_changes (int or None): Value of `changes` when the last snapshot was published.
 
     Methods:
         __init__(): Initializes the SlurmJobTracker instance.
@@ -36,12 +63,26 @@ class SlurmJobTracker:
         get_current_jobs(): Retrieves current running jobs from Slurm.
         time_to_seconds(time_str): Converts a time string to seconds, supporting days.
         find_job_file(job_id, directory=None, max_search_time=10): Finds the output file associated with a job ID within a time limit.
-        submit_task(working_dir, script_name="submit.sh"): Adds a task to the submission queue.
-        process_submission_queue(running_jobs_count): Processes the submission queue and submits jobs.
+        submit_task(working_dir, script_name="submit.sh", options=None): Adds a task to the submission queue.
+        process_submission_queue(running_jobs_count, available_slots=None): Processes the submission queue and submits jobs.
+        retry_submission(working_dir, script_name, options): Schedules a failed submission for a delayed retry.
+        submission_succeeded(job_id, working_dir, script_name, options): Starts tracking a submitted job.
+        submission_failed(options): Records a task that could not be submitted.
+        resubmit_failed_job(job_id, state): Queues a job that ended in a failure state again.
         handle_command(command): Handles incoming commands from the server.
+        apply_delta(delta, timestamp): Applies the changes since the last squeue poll to the tracked jobs.
+        tick(): Runs one tracking cycle.
         track_jobs(): Main loop to track jobs.
         is_slurm_reason(reason): Checks if the string from NODELIST(REASON) is a Slurm reason or a node name.
+        index_nodes(job_id, nodelist): Updates the node index entry of a job.
+        filter_jobs(nodes=None, state=None): Returns the tracked jobs on the given nodes and in the given state.
+        get_queue(): Retrieves the queued and retrying tasks.
+        publish_snapshot(timestamp, jobs_changed=True): Publishes the current state for read-only replicas if it changed.
         get_info(): Retrieves information about the tracker's current state.
+        get_stats(): Retrieves runtime statistics and the queue drain estimate.
+        get_profile(duration=0, limit=None): Returns recent tick traces and optionally a sampling profile.
+        find_output_file(job_id): Returns the path of the output file of a running or completed job.
+        tail_output(job_id, lines=OUTPUT_TAIL_LINES, offset=None, length=None): Reads the output of a job.
     """
 
     def __init__(self):
@@ -53,9 +94,25 @@ class SlurmJobTracker:
         self.job_files = {}
         self.submission_queue = Queue()
         self.lock = threading.Lock()
+        self.governor = SubmissionGovernor(max_jobs=self.max_jobs)
+        self.stats = JobStatistics()
+        self.reconciler = SacctReconciler()
+        self.output = OutputReader()
+        self.workflows = WorkflowManager(self.submit_task)
+        self.submit_retries = SUBMIT_RETRIES
+        self.max_resubmits = MAX_RESUBMITS
+        self.retries = RetryQueue()
+        self.idempotency = IdempotencyIndex()
+        self.job_options = {}
+        self.nodes = NodeIndex()
+        self.tracer = TickTracer()
+        self.snapshots = SnapshotWriter() if SNAPSHOT_FILE else None
+        self.changes = 0
+        self.published_changes = None
 
         self.load_history()
         self.load_current_files()
+        self.stats.load(self.completed_jobs)
 
     def load_history(self):
         """Load job history from a file."""
@@ -79,7 +136,10 @@ class SlurmJobTracker:
                         'filename': job_info.get('filename', None),
                         'start_time': job_info.get('start_time', None),
                         'nodelist': job_info.get('nodelist', None),
+                        'state': job_info.get('state', None),
+                        'script_name': job_info.get('script_name', None),
                     }
+                    self.index_nodes(job_id, job_info.get('nodelist'))
             logging.info("Loaded current job data.")
         except (FileNotFoundError, json.JSONDecodeError):
             logging.info("No existing current job data found.")
@@ -117,6 +177,7 @@ class SlurmJobTracker:
             time_index = header_columns.index("TIME")
             job_id_index = header_columns.index("JOBID")
             nodelist_index = header_columns.index("NODELIST(REASON)")
+            state_index = header_columns.index("ST")
 
             current_jobs = []
             for row in rows:
@@ -126,13 +187,16 @@ class SlurmJobTracker:
                     columns) > time_index else ""
                 nodelist = columns[nodelist_index] if len(
                     columns) > nodelist_index else ""
+                state = columns[state_index] if len(
+                    columns) > state_index else ""
 
                 if start_time.strip():
                     current_time = datetime.datetime.now()
                     running_time = self.time_to_seconds(start_time)
                     start_timestamp = (current_time - datetime.timedelta(seconds=running_time)).strftime(
                         '%Y-%m-%d %H:%M:%S') if running_time > 0 else None
-                    current_jobs.append((job_id, start_timestamp, nodelist))
+                    current_jobs.append(
+                        (job_id, start_timestamp, nodelist, state))
                 else:
                     logging.warning(
                         f"Missing time for job {job_id}, skipping.")
@@ -170,7 +234,11 @@ class SlurmJobTracker:
             return 0
 
     def find_job_file(self, job_id, directory=None, max_search_time=10):
-        """Find the output file associated with a job ID with a time limit."""
+        """
+        Find the output file associated with a job ID with a time limit.
+
+        The tracked jobs are not modified; the caller stores the result under the lock.
+        """
         if job_id in self.job_files:
             return self.job_files[job_id]
 
@@ -187,8 +255,6 @@ class SlurmJobTracker:
 
             if job_file:
                 directory, filename = os.path.split(job_file)
-                self.job_files[job_id] = {
-                    'directory': directory, 'filename': filename}
                 return {'directory': directory, 'filename': filename}
             else:
                 return {'directory': None, 'filename': None}
@@ -196,13 +262,35 @@ class SlurmJobTracker:
             logging.warning(f"Search for job ID {job_id} timed out or failed.")
             return {'directory': None, 'filename': None}
 
-    def submit_task(self, working_dir, script_name="submit.sh"):
-        """Add a task to the submission queue."""
-        self.submission_queue.put((working_dir, script_name))
+    def submit_task(self, working_dir, script_name="submit.sh", options=None):
+        """
+        Add a task to the submission queue.
+
+        Tasks with `options` (e.g. the workflow and task name of a workflow task) are
+        queued as ``(working_dir, script_name, options)``.
+        """
+        if options:
+            self.submission_queue.put((working_dir, script_name, options))
+        else:
+            self.submission_queue.put((working_dir, script_name))
+        self.changes += 1
         logging.info(f"Task queued: {script_name} in {working_dir}")
 
-    def process_submission_queue(self, running_jobs_count):
-        """Process the submission queue and submit jobs."""
+    def process_submission_queue(self, running_jobs_count, available_slots=None):
+        """
+        Process the submission queue and submit jobs.
+
+        If `available_slots` is given (as computed by the governor) at most that many tasks
+        are submitted, otherwise the queue is drained until `max_jobs` jobs are running.
+        """
+        if available_slots is None:
+            available_slots = self.max_jobs - running_jobs_count
+
+        with self.lock:
+            for task in self.retries.pop_due():
+                self.submission_queue.put(task)
+                self.changes += 1
+
         initial_queue_size = self.submission_queue.qsize()
 
         logging.info(
@@ -210,43 +298,57 @@ class SlurmJobTracker:
 
         tasks_processed = 0
 
+        # The lock is held for every state change but not while sbatch runs
         while not self.submission_queue.empty():
-            if running_jobs_count >= self.max_jobs:
-                logging.info(f"Maximum job limit reached ({self.max_jobs}).")
+            if tasks_processed >= available_slots:
+                logging.info(
+                    f"No free job slots left ({running_jobs_count} jobs, limit {self.max_jobs}).")
                 break
 
-            working_dir, script_name = self.submission_queue.get()
+            working_dir, script_name, *rest = self.submission_queue.get()
+            options = rest[0] if rest else {}
+
+            with self.lock:
+                self.changes += 1  # The task left the queue
+                cancelled = self.workflows.is_cancelled(options)
+                sbatch_args = self.workflows.sbatch_args(options)
+            if cancelled:
+                logging.info(
+                    f"Skipping cancelled workflow task {script_name} in {working_dir}")
+                continue
 
             if not os.path.exists(working_dir):
                 logging.error(
                     f"Working directory does not exist: {working_dir}")
+                with self.lock:
+                    self.submission_failed(options)
                 continue
 
             script_path = os.path.join(working_dir, script_name)
             if not os.path.isfile(script_path):
                 logging.error(f"Script not found: {script_path}")
+                with self.lock:
+                    self.submission_failed(options)
                 continue
 
+            job_id = None
             try:
                 logging.info(
                     f"Submitting task: {script_name} from {working_dir}")
-                result = subprocess.run(
-                    ["sbatch", script_name],
-                    cwd=working_dir,
-                    check=True,
-                    capture_output=True,
-                    text=True
-                )
+                with self.tracer.span('sbatch', working_dir=working_dir):
+                    result = subprocess.run(
+                        ["sbatch", *sbatch_args, script_name],
+                        cwd=working_dir,
+                        check=True,
+                        capture_output=True,
+                        text=True
+                    )
                 output = result.stdout.strip()
                 match = re.search(r"Submitted batch job (\d+)", output)
                 if match:
                     job_id = match.group(1)
                     logging.info(
                         f"Task {job_id} submitted successfully with message: {result.stdout.strip()}")
-                    running_jobs_count += 1
-                    tasks_processed += 1
-                    self.job_files[job_id] = {
-                        'directory': working_dir, 'filename': f"slurm-{job_id}.out"}
                 else:
                     logging.error(
                         f"Failed to submit task {script_name} from {working_dir}: {output}")
@@ -258,12 +360,136 @@ class SlurmJobTracker:
                 logging.error(
                     f"Unexpected error while submitting task {script_name} from {working_dir}: {e}")
 
+            with self.lock:
+                if job_id is None:
+                    self.retry_submission(working_dir, script_name, options)
+                    continue
+                self.submission_succeeded(job_id, working_dir, script_name, options)
+            running_jobs_count += 1
+            tasks_processed += 1
+
         remaining_tasks = self.submission_queue.qsize()
         logging.info(
             f"Submission queue processing complete. {remaining_tasks} tasks remain in the queue. {tasks_processed} tasks processed.")
 
         return remaining_tasks
 
+    def retry_submission(self, working_dir, script_name, options):
+        """Schedule a failed submission for a retry with exponential backoff, or give up."""
+        attempt = options.get('attempt', 0) + 1
+        if attempt > self.submit_retries:
+            logging.error(
+                f"Giving up on task {script_name} from {working_dir} after {self.submit_retries} retries.")
+            self.submission_failed(options)
+            return
+        self.changes += 1
+        delay = self.retries.push(
+            (working_dir, script_name, {**options, 'attempt': attempt}), attempt)
+        logging.info(
+            f"Retrying task {script_name} from {working_dir} in {delay} seconds (retry {attempt}).")
+
+    def submission_succeeded(self, job_id, working_dir, script_name, options):
+        """Start tracking a submitted job and record it in its workflow and idempotency entry."""
+        self.changes += 1
+        self.job_files[job_id] = {
+            'directory': working_dir, 'filename': f"slurm-{job_id}.out", 'state': 'PD',
+            'script_name': script_name}
+        if options:
+            self.job_options[job_id] = options
+        self.workflows.task_submitted(options, job_id)
+        if 'idempotency_key' in options:
+            self.idempotency.update(
+                options['idempotency_key'], state='submitted', job_id=job_id)
+
+    def submission_failed(self, options):
+        """Record a task that could not be submitted."""
+        self.workflows.task_failed(options)
+        if 'idempotency_key' in options:
+            self.idempotency.update(options['idempotency_key'], state='failed')
+
+    def resubmit_failed_job(self, job_id, state):
+        """
+        Queue a finished job again if it ended in one of RESUBMIT_STATES and has
+        resubmissions left. Returns True if the job was resubmitted.
+        """
+        options = self.job_options.get(job_id, {})
+        job_info = self.completed_jobs.get(job_id, {})
+        resubmits = options.get('resubmits', 0)
+        if (state not in RESUBMIT_STATES or resubmits >= options.get('max_resubmits', self.max_resubmits)
+                or not job_info.get('directory') or not job_info.get('script_name')
+                or not self.workflows.can_resubmit(options)):
+            return False
+
+        logging.info(
+            f"Job {job_id} ended with {state}, resubmitting (resubmission {resubmits + 1}).")
+        self.workflows.job_resubmitted(job_id)
+        options = {key: value for key, value in options.items()
+                   if key != 'attempt'}
+        options['resubmits'] = resubmits + 1
+        self.submit_task(job_info['directory'],
+                         job_info['script_name'], options)
+        self.completed_jobs[job_id] = {**job_info, 'resubmitted': True}
+        return True
+
+    def index_nodes(self, job_id, nodelist):
+        """Update the node index entry of a job from its squeue node list."""
+        try:
+            self.nodes.update(job_id, nodelist)
+        except ValueError as e:
+            logging.warning(f"Cannot index the nodes of job {job_id}: {e}")
+
+    def filter_jobs(self, nodes=None, state=None):
+        """
+        Return the tracked jobs running on any node of the hostlist `nodes` and in squeue `state`.
+
+        A node filter is answered from the node index; raises ValueError for an invalid hostlist.
+        """
+        return self.nodes.select(self.job_files, nodes, state)
+
+    def get_queue(self):
+        """Get the tasks waiting in the submission queue and for a retry."""
+        queue_contents = list(self.submission_queue.queue)
+        return {
+            'status': 'Queue retrieved',
+            'timestamp': str(datetime.datetime.now()),
+            'queued_tasks': [
+                {'working_dir': task[0], 'script_name': task[1], **(task[2] if len(task) > 2 else {})}
+                for task in queue_contents
+            ],
+            'retrying_tasks': [
+                {'working_dir': task[0], 'script_name': task[1], **task[2],
+                 'retry_at': str(datetime.datetime.fromtimestamp(retry_time))}
+                for retry_time, task in self.retries.tasks()
+            ]
+        }
+
+    def publish_snapshot(self, timestamp, jobs_changed=True):
+        """
+        Publish the current state for replicas, see `SnapshotWriter`.
+
+        Unless `jobs_changed`, a new version is only written if the queue, the retries or
+        the submitted jobs changed since the last snapshot, as counted by `changes`, so
+        idle ticks cost nothing. Returns True if one was written.
+        """
+        with self.lock:
+            if not jobs_changed and self.changes == self.published_changes:
+                return False
+            changes = self.changes
+            meta = {
+                'timestamp': timestamp,
+                'info': {key: value for key, value in self.get_info().items() if key not in ('status', 'timestamp')},
+                'queue': {key: value for key, value in self.get_queue().items() if key not in ('status', 'timestamp')}
+            }
+            # Entries are copy-on-write, shallow copies are enough to encode outside the lock
+            running_jobs, completed_jobs = dict(self.job_files), dict(self.completed_jobs)
+        try:
+            self.snapshots.publish(running_jobs, completed_jobs, meta)
+        except OSError as e:
+            logging.error(f"Error publishing snapshot: {e}")
+            return False
+        self.published_changes = changes
+        return True
+
     def get_info(self):
         """Get information about the tracker's current state."""
         return {
@@ -271,49 +497,188 @@ class SlurmJobTracker:
             'timestamp': str(datetime.datetime.now()),
             'max_jobs': self.max_jobs,
             'interval': self.interval,
+            'max_pending_jobs': self.governor.max_pending,
             'running_jobs_count': len(self.job_files),
+            'pending_jobs_count': self.governor.count_jobs(self.job_files)[1],
             'completed_jobs_count': len(self.completed_jobs),
-            'queued_tasks_count': self.submission_queue.qsize()
+            'queued_tasks_count': self.submission_queue.qsize(),
+            'retrying_tasks_count': len(self.retries),
+            'nodes_in_use_count': len(self.nodes)
+        }
+
+    def get_stats(self):
+        """Get runtime statistics and the estimated time to drain the submission queue."""
+        response = {
+            'status': 'Stats retrieved',
+            'timestamp': str(datetime.datetime.now()),
+        }
+        response.update(self.stats.summary(
+            self.submission_queue.qsize(), self.max_jobs))
+        return response
+
+    def get_profile(self, duration=0, limit=None):
+        """
+        Return the recent tick traces and, for a positive `duration`, a profile of all threads.
+
+        The profile samples the stacks of the tracker and server threads for `duration`
+        seconds, at most PROFILE_MAX_DURATION. Raises ValueError for a duration that is not
+        a finite number or a negative limit.
+        """
+        duration = float(duration)
+        if not math.isfinite(duration):
+            raise ValueError(f"Invalid duration: {duration}")
+        duration = min(max(duration, 0), PROFILE_MAX_DURATION)
+        limit = int(limit) if limit else None
+        if limit is not None and limit < 0:
+            raise ValueError(f"Invalid limit: {limit}")
+        response = {
+            'status': 'Profile retrieved',
+            'timestamp': str(datetime.datetime.now()),
+            'ticks': self.tracer.recent(limit)
+        }
+        if duration:
+            response['profile'] = sample_stacks(duration)
+        return response
+
+    def find_output_file(self, job_id):
+        """Return the path of the output file of a running or completed job, or None."""
+        job_info = self.job_files.get(job_id) or self.completed_jobs.get(job_id)
+        if not job_info or not job_info.get('directory') or not job_info.get('filename'):
+            return None
+        return os.path.join(job_info['directory'], job_info['filename'])
+
+    def tail_output(self, job_id, lines=OUTPUT_TAIL_LINES, offset=None, length=None):
+        """
+        Read the output of a job.
+
+        Returns the last `lines` lines, or, if `offset` is given, up to `length` bytes
+        starting at `offset` (negative offsets count from the end of the file). The
+        returned `next_offset` can be passed as `offset` to read only new output.
+        """
+        path = self.find_output_file(job_id)
+        if path is None or not os.path.isfile(path):
+            return {
+                'status': 'Output not found',
+                'timestamp': str(datetime.datetime.now()),
+                'job_id': job_id
+            }
+
+        if offset is None:
+            data, offset, size = self.output.tail(path, lines)
+        else:
+            data, offset, size = self.output.read(path, offset, length)
+        return {
+            'status': 'Output retrieved',
+            'timestamp': str(datetime.datetime.now()),
+            'job_id': job_id,
+            'path': path,
+            'running': job_id in self.job_files,
+            'data': data.decode('utf-8', errors='replace'),
+            'offset': offset,
+            'next_offset': offset + len(data),
+            'size': size
         }
 
     def handle_command(self, command):
         """Handle incoming commands from the server."""
         logging.info(f"Handling command: {command}")
+        if command.get('command') == 'get_profile':
+            # Holding the lock during the capture would stall the tracker thread
+            args = command.get('args', {})
+            try:
+                return self.get_profile(args.get('duration', 0), args.get('limit'))
+            except (TypeError, ValueError) as e:
+                return {
+                    'status': 'Invalid profile request',
+                    'timestamp': str(datetime.datetime.now()),
+                    'error': str(e)
+                }
         with self.lock:
             if command['command'] == 'submit_task':
                 args = command.get('args', {})
                 working_dir = args.get('working_dir')
                 script_name = args.get('script_name', 'submit_gpaw_alec.sh')
-                self.submit_task(working_dir, script_name)
+                idempotency_key = args.get('idempotency_key')
+                # Validate everything before the key is registered, a rejected task must not hold it
+                options = {}
+                try:
+                    if idempotency_key is not None and not isinstance(idempotency_key, str):
+                        raise ValueError("idempotency_key must be a string")
+                    if args.get('max_resubmits') is not None:
+                        options['max_resubmits'] = int(args['max_resubmits'])
+                        if options['max_resubmits'] < 0:
+                            raise ValueError("max_resubmits must not be negative")
+                except (TypeError, ValueError) as e:
+                    return {
+                        'status': 'Invalid task',
+                        'timestamp': str(datetime.datetime.now()),
+                        'error': str(e)
+                    }
+
+                if idempotency_key is not None:
+                    record = self.idempotency.get(idempotency_key)
+                    if record is not None:
+                        response = {
+                            'status': 'Duplicate task',
+                            'timestamp': str(datetime.datetime.now()),
+                            'idempotency_key': idempotency_key,
+                            **{key: value for key, value in record.items() if key != 'created'}
+                        }
+                        logging.debug(f"response: {response}")
+                        return response
+                    self.idempotency.add(
+                        idempotency_key, working_dir, script_name)
+
+                if idempotency_key is not None:
+                    options['idempotency_key'] = idempotency_key
+                self.submit_task(working_dir, script_name, options)
                 response= {
                     'status': 'Task submitted',
                     'timestamp': str(datetime.datetime.now()),
                     'working_dir': working_dir,
                     'script_name': script_name
                 }
+                if idempotency_key is not None:
+                    response['idempotency_key'] = idempotency_key
                 logging.debug(f"response: {response}")
                 return response
 
             elif command['command'] == 'get_status':
+                args = command.get('args', {})
+                if args.get('job_id') is not None:
+                    job_id = str(args['job_id'])
+                    return {
+                        'status': 'Status retrieved',
+                        'timestamp': str(datetime.datetime.now()),
+                        'running_jobs': {job_id: self.job_files[job_id]} if job_id in self.job_files else {},
+                        'completed_jobs': {job_id: self.completed_jobs[job_id]} if job_id in self.completed_jobs else {}
+                    }
+                if args.get('nodes') or args.get('state'):
+                    # Filtered requests only cover tracked jobs, finished jobs occupy no nodes
+                    try:
+                        running_jobs = self.filter_jobs(args.get('nodes'), args.get('state'))
+                    except ValueError as e:
+                        return {
+                            'status': 'Invalid hostlist',
+                            'timestamp': str(datetime.datetime.now()),
+                            'error': str(e)
+                        }
+                    return {
+                        'status': 'Status retrieved',
+                        'timestamp': str(datetime.datetime.now()),
+                        'running_jobs': running_jobs
+                    }
                 response = {
                     'status': 'Status retrieved',
                     'timestamp': str(datetime.datetime.now()),
-                    'running_jobs': self.job_files,
-                    'completed_jobs': self.completed_jobs
+                    'running_jobs': dict(self.job_files),
+                    'completed_jobs': dict(self.completed_jobs)
                 }
                 logging.debug(f"response: {response}")
                 return response
 
             elif command['command'] == 'get_queue':
-                queue_contents = list(self.submission_queue.queue)
-                response = {
-                    'status': 'Queue retrieved',
-                    'timestamp': str(datetime.datetime.now()),
-                    'queued_tasks': [
-                        {'working_dir': task[0], 'script_name': task[1]}
-                        for task in queue_contents
-                    ]
-                }
+                response = self.get_queue()
                 logging.debug(f"response: {response}")
                 return response
 
@@ -322,123 +687,224 @@ class SlurmJobTracker:
                 logging.debug(f"response: {response}")
                 return response
 
-            else:
-                return {'status': 'Unknown command'}
+            elif command['command'] == 'get_stats':
+                response = self.get_stats()
+                logging.debug(f"response: {response}")
+                return response
 
-    def track_jobs(self):
-        """Main loop to track jobs."""
-        while True:
-            job_dict = {'timestamp': str(datetime.datetime.now()), 'jobs': {}}
-            # expected to return (job_id, running_time, nodelist)
-            current_jobs = self.get_current_jobs()
-            running_string = ''
-
-            for job_id, new_start_time, new_nodelist in current_jobs:
-
-                # If we have old job info
-                if job_id in self.job_files:
-                    job_info = self.job_files[job_id]
-                    old_start_time = job_info.get('start_time', None)
-
-                    # Determine final start_time: keep old if not None, else use new
-                    final_start_time = old_start_time if old_start_time is not None else new_start_time
-
-                    # If the job is in a reason state, skip searching for the file
-                    if self.is_slurm_reason(new_nodelist):
-                        logging.info(
-                            f'Job {job_id} is in a reason state and not assigned to a node, skipping file search.')
-                        job_dict['jobs'][job_id] = {
-                            'start_time': final_start_time,
-                            'directory': job_info.get('directory'),
-                            'filename': job_info.get('filename'),
-                            'nodelist': new_nodelist
-                        }
-                    else:
-                        # Not in reason state
-                        if job_info.get('filename'):
-                            # Already have the filename
-                            job_dict['jobs'][job_id] = {
-                                'start_time': final_start_time,
-                                'directory': job_info.get('directory'),
-                                'filename': job_info.get('filename'),
-                                'nodelist': new_nodelist
-                            }
-                        else:
-                            # Need to find the file
-                            job_file = self.find_job_file(job_id)
-                            job_dict['jobs'][job_id] = {
-                                'start_time': final_start_time,
-                                'directory': job_file['directory'],
-                                'filename': job_file['filename'],
-                                'nodelist': new_nodelist
-                            }
+            elif command['command'] == 'submit_workflow':
+                args = command.get('args', {})
+                try:
+                    workflow = self.workflows.submit(
+                        args.get('tasks', []), args.get('name'))
+                except ValueError as e:
+                    return {
+                        'status': 'Invalid workflow',
+                        'timestamp': str(datetime.datetime.now()),
+                        'error': str(e)
+                    }
+                response = {
+                    'status': 'Workflow submitted',
+                    'timestamp': str(datetime.datetime.now()),
+                    **workflow.summary()
+                }
+                logging.debug(f"response: {response}")
+                return response
 
-                else:
-                    # This is a newly detected job
-                    # For new jobs, if start_time wasn't previously set, we rely on new_start_time
-                    final_start_time = new_start_time
-
-                    if self.is_slurm_reason(new_nodelist):
-                        logging.info(
-                            f'Job {job_id} is in a reason state, skipping file search.')
-                        job_dict['jobs'][job_id] = {
-                            'start_time': final_start_time,
-                            'directory': None,
-                            'filename': None,
-                            'nodelist': new_nodelist
-                        }
-                    else:
-                        # Attempt to find the file for a new running job
-                        job_file = self.find_job_file(job_id)
-                        job_dict['jobs'][job_id] = {
-                            'start_time': final_start_time,
-                            'directory': job_file['directory'],
-                            'filename': job_file['filename'],
-                            'nodelist': new_nodelist
-                        }
+            elif command['command'] == 'get_workflow':
+                args = command.get('args', {})
+                workflow_id = args.get('workflow_id')
+                if workflow_id is None:
+                    return {
+                        'status': 'Workflows retrieved',
+                        'timestamp': str(datetime.datetime.now()),
+                        'workflows': [workflow.summary() for workflow in self.workflows.workflows.values()]
+                    }
+                workflow = self.workflows.get_workflow(
+                    workflow_id, args.get('include_tasks', True))
+                if workflow is None:
+                    return {
+                        'status': 'Workflow not found',
+                        'timestamp': str(datetime.datetime.now()),
+                        'workflow_id': workflow_id
+                    }
+                response = {
+                    'status': 'Workflow retrieved',
+                    'timestamp': str(datetime.datetime.now()),
+                    **workflow
+                }
+                logging.debug(f"response: {response}")
+                return response
 
-                # Construct the running string for logging
-                job_info_current = job_dict['jobs'][job_id]
-                running_string += (f"{job_id} - {job_info_current['start_time']} -> "
-                                   f"{job_info_current['directory']}/{job_info_current['filename']} "
-                                   f"(Node: {job_info_current['nodelist']})\n")
+            elif command['command'] == 'get_node':
+                args = command.get('args', {})
+                try:
+                    if not args.get('node'):
+                        raise ValueError("No node given.")
+                    nodes = self.nodes.lookup(args['node'])
+                except ValueError as e:
+                    return {
+                        'status': 'Invalid hostlist',
+                        'timestamp': str(datetime.datetime.now()),
+                        'error': str(e)
+                    }
+                response = {
+                    'status': 'Node retrieved',
+                    'timestamp': str(datetime.datetime.now()),
+                    'nodes': nodes,
+                    'jobs': {job_id: self.job_files[job_id] for job_ids in nodes.values()
+                             for job_id in job_ids if job_id in self.job_files}
+                }
+                logging.debug(f"response: {response}")
+                return response
 
-            logging.info('\n-----Now running:-----\n' +
-                         running_string + '\n-----------------------')
-            self.save_current(job_dict)
+            elif command['command'] == 'tail_output':
+                args = command.get('args', {})
+                try:
+                    lines = int(args.get('lines', OUTPUT_TAIL_LINES))
+                    offset = int(args['offset']) if args.get('offset') is not None else None
+                    length = int(args['length']) if args.get('length') is not None else None
+                except (TypeError, ValueError) as e:
+                    return {
+                        'status': 'Invalid output request',
+                        'timestamp': str(datetime.datetime.now()),
+                        'error': str(e)
+                    }
+                response = self.tail_output(str(args.get('job_id')), lines, offset, length)
+                logging.debug(f"response: {response}")
+                return response
 
-            current_job_ids = set(job_dict['jobs'].keys())
-            previous_job_ids = set(self.job_files.keys())
+            else:
+                return {'status': 'Unknown command'}
 
-            # Determine which jobs finished and which are new
-            finished_jobs = previous_job_ids - current_job_ids
-            new_jobs = current_job_ids - previous_job_ids
+    def apply_delta(self, delta, timestamp):
+        """
+        Apply the difference to the last squeue poll to `job_files` and `completed_jobs`.
+
+        Only added, changed and finished jobs are touched. Changed entries are replaced
+        instead of modified, so responses still holding the previous entry are unaffected.
+        """
+        # Searching output files may take seconds, so it is done before taking the lock
+        new_files = {}
+        for job_id, (_, nodelist, _) in delta.added.items():
+            if self.is_slurm_reason(nodelist):
+                logging.info(
+                    f'Job {job_id} is in a reason state, skipping file search.')
+                new_files[job_id] = {'directory': None, 'filename': None}
+            else:
+                with self.tracer.span('find_job_file', job_id=job_id):
+                    new_files[job_id] = self.find_job_file(job_id)
 
-            # Log finished jobs
-            for job_id in finished_jobs:
-                self.completed_jobs[job_id] = {
-                    'start_time': self.job_files[job_id].get('start_time', None),
-                    'end_time': job_dict.get('timestamp', None),
-                    'directory': self.job_files[job_id].get('directory', None),
-                    'filename': self.job_files[job_id].get('filename', None),
-                    'nodelist': self.job_files[job_id].get('nodelist', None)
+        with self.lock:
+            for job_id, (start_time, nodelist, state) in delta.added.items():
+                self.job_files[job_id] = {
+                    'start_time': start_time,
+                    'directory': new_files[job_id]['directory'],
+                    'filename': new_files[job_id]['filename'],
+                    'nodelist': nodelist,
+                    'state': state,
+                    'script_name': None
                 }
-                logging.info(f"Job finished: {job_id}")
-
-            # Log newly detected jobs
-            for job_id in new_jobs:
+                self.index_nodes(job_id, nodelist)
                 logging.info(f"New job detected: {job_id}")
 
-            self.save_history()
-            self.job_files = job_dict['jobs']
+            for job_id, (start_time, nodelist, state) in delta.changed.items():
+                job_info = self.job_files[job_id]
+                old_start_time = job_info.get('start_time', None)
+                self.job_files[job_id] = {
+                    **job_info,
+                    # Keep the first known start time, later polls only drift
+                    'start_time': old_start_time if old_start_time is not None else start_time,
+                    'nodelist': nodelist,
+                    'state': state
+                }
+                if nodelist != job_info.get('nodelist'):
+                    self.index_nodes(job_id, nodelist)
+                logging.info(
+                    f"Job {job_id} changed: {job_info.get('state')} -> {state} (Node: {nodelist})")
 
-            running_jobs_count = len(current_job_ids)
-            queued_tasks = self.process_submission_queue(running_jobs_count)
+            for job_id in delta.removed:
+                job_info = self.job_files.pop(job_id)
+                self.nodes.remove(job_id)
+                self.completed_jobs[job_id] = {
+                    'start_time': job_info.get('start_time', None),
+                    'end_time': timestamp,
+                    'directory': job_info.get('directory', None),
+                    'filename': job_info.get('filename', None),
+                    'nodelist': job_info.get('nodelist', None),
+                    'script_name': job_info.get('script_name', None)
+                }
+                logging.info(f"Job finished: {job_id}")
+
+    def tick(self):
+        """Poll squeue once, update the tracked jobs and submit queued tasks, tracing every phase."""
+        with self.tracer.tick():
+            timestamp = str(datetime.datetime.now())
+            with self.tracer.span('squeue'):
+                # expected to return (job_id, start_time, nodelist, state)
+                current_jobs = self.get_current_jobs()
+            with self.tracer.span('diff', jobs=len(current_jobs)):
+                delta = diff_jobs(self.job_files, current_jobs)
+            with self.tracer.span('apply_delta', added=len(delta.added), changed=len(delta.changed),
+                                  removed=len(delta.removed)):
+                self.apply_delta(delta, timestamp)
+
+            logging.info(f"Tracking {len(self.job_files)} jobs: {delta.summary()}.")
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                running_string = ''.join(
+                    f"{job_id} - {job_info.get('start_time')} -> "
+                    f"{job_info.get('directory')}/{job_info.get('filename')} "
+                    f"(Node: {job_info.get('nodelist')})\n"
+                    for job_id, job_info in self.job_files.items())
+                logging.debug('\n-----Now running:-----\n' +
+                              running_string + '\n-----------------------')
+            if delta:
+                with self.tracer.span('save_current'):
+                    self.save_current({'timestamp': timestamp, 'jobs': self.job_files})
+
+            # Replace the tick-based times with the accounting data, then update the statistics
+            with self.tracer.span('sacct'):
+                self.reconciler.add(delta.removed)
+                finalized = self.reconciler.reconcile(self.completed_jobs)
+            # Handler threads iterate the statistics and workflows under the lock
+            with self.tracer.span('finished_jobs', jobs=len(finalized)), self.lock:
+                for job_id in finalized:
+                    if job_id in self.completed_jobs:
+                        self.stats.record(job_id, self.completed_jobs[job_id])
+                    state = self.completed_jobs.get(job_id, {}).get('state')
+                    if state is None and self.reconciler.available:
+                        # sacct is there but gave up on the job: it may have failed or still run
+                        state = UNKNOWN_STATE
+                    if not self.resubmit_failed_job(job_id, state):
+                        # Release or cancel the downstream tasks of workflow jobs
+                        self.workflows.job_finished(job_id, state)
+                    self.job_options.pop(job_id, None)
+
+            if delta.removed or finalized:
+                with self.tracer.span('save_history'):
+                    self.save_history()
+
+            running_jobs_count = len(self.job_files)
+            with self.tracer.span('governor'):
+                available_slots = self.governor.available_slots(
+                    self.job_files, self.stats)
+            with self.tracer.span('submit', slots=available_slots):
+                queued_tasks = self.process_submission_queue(
+                    running_jobs_count, available_slots)
 
             if queued_tasks > 0:
                 logging.info(
                     f"{queued_tasks} tasks queued, waiting for job slots to free up.")
 
+            if self.snapshots is not None:
+                # Submissions and resubmissions are counted in `changes`
+                with self.tracer.span('publish_snapshot'):
+                    self.publish_snapshot(timestamp, jobs_changed=bool(delta or finalized))
+
+    def track_jobs(self):
+        """Main loop to track jobs."""
+        while True:
+            self.tick()
             time.sleep(self.interval)
 
     @staticmethod
@@ -0,0 +1,50 @@
+import socket
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+
+
+class UnixHTTPConnection(HTTPConnection):
+    """HTTP connection over a Unix domain socket."""
+
+    def __init__(self, *args, socket_path=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.socket_path = socket_path
+
+    def _new_conn(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+
+class UnixHTTPConnectionPool(HTTPConnectionPool):
+    """Connection pool creating `UnixHTTPConnection` connections."""
+
+    ConnectionCls = UnixHTTPConnection
+
+
+class UnixSocketAdapter(HTTPAdapter):
+    """
+    Transport adapter sending every request of a `requests.Session` to a Unix domain socket.
+
+    The host part of the URL is ignored, requests are routed to `socket_path`.
+    """
+
+    def __init__(self, socket_path, pool_maxsize=10, **kwargs):
+        self.socket_path = socket_path
+        self.unix_pool = UnixHTTPConnectionPool(
+            "localhost", maxsize=pool_maxsize, socket_path=socket_path)
+        super().__init__(pool_maxsize=pool_maxsize, **kwargs)
+
+    def get_connection(self, url, proxies=None):
+        return self.unix_pool
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        return self.unix_pool
+
+    def close(self):
+        super().close()
+        self.unix_pool.close()
@@ -1,3 +1,4 @@
+import datetime
 import logging
 
 
@@ -7,3 +8,13 @@ def setup_logging():
         format='[%(asctime)s] %(levelname)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S',
     )
+
+
+def parse_timestamp(value):
+    """Parse a timestamp stored by the tracker, returning None if it is missing or invalid."""
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
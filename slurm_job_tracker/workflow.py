@@ -0,0 +1,275 @@
+import datetime
+import logging
+import uuid
+from collections import Counter, deque
+
+from .config import WORKFLOW_SLURM_DEPENDENCIES
+
+# Accounting states treated as success; None means sacct was not available
+SUCCESS_STATES = (None, 'COMPLETED')
+# State of jobs sacct never reported a final record for, e.g. while slurmdbd is down
+UNKNOWN_STATE = 'UNKNOWN'
+
+
+class WorkflowTask:
+    """A task of a workflow and its position in the dependency graph."""
+
+    __slots__ = ('name', 'working_dir', 'script_name', 'depends_on', 'dependents', 'state', 'job_id',
+                 'unsubmitted', 'unfinished')
+
+    def __init__(self, name, working_dir, script_name, depends_on):
+        self.name = name
+        self.working_dir = working_dir
+        self.script_name = script_name
+        self.depends_on = depends_on
+        self.dependents = []
+        self.state = 'waiting'
+        self.job_id = None
+        self.unsubmitted = len(depends_on)  # Upstream tasks without a job id
+        self.unfinished = len(depends_on)  # Upstream tasks not completed yet
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'working_dir': self.working_dir,
+            'script_name': self.script_name,
+            'depends_on': self.depends_on,
+            'state': self.state,
+            'job_id': self.job_id,
+        }
+
+
+class Workflow:
+    """A directed acyclic graph of tasks submitted together."""
+
+    def __init__(self, workflow_id, name, tasks):
+        self.workflow_id = workflow_id
+        self.name = name
+        self.tasks = tasks
+        self.created = str(datetime.datetime.now())
+        self.counts = Counter(task.state for task in tasks.values())
+
+    @property
+    def state(self):
+        if any(self.counts[state] for state in ('waiting', 'queued', 'submitted')):
+            return 'running'
+        return 'completed' if self.counts['completed'] == len(self.tasks) else 'failed'
+
+    def set_state(self, task, state):
+        self.counts[task.state] -= 1
+        self.counts[state] += 1
+        task.state = state
+
+    def summary(self):
+        return {
+            'workflow_id': self.workflow_id,
+            'name': self.name,
+            'created': self.created,
+            'state': self.state,
+            'task_count': len(self.tasks),
+            'task_states': {state: count for state, count in self.counts.items() if count},
+        }
+
+
+class WorkflowManager:
+    """
+    Schedule the tasks of dependency graphs onto the submission queue.
+
+    Tasks are released in topological order with per-task counters of unsubmitted and
+    unfinished upstream tasks, so each submission or completion only touches the direct
+    dependents of a task. With `use_slurm_dependencies` a task is queued as soon as all
+    its upstream tasks have job ids and is submitted with ``--dependency=afterok``;
+    otherwise it is queued once all upstream tasks have completed. When a task fails,
+    all its downstream tasks are cancelled.
+
+    Attributes:
+        use_slurm_dependencies (bool): Let Slurm hold downstream jobs instead of the tracker.
+        workflows (dict): Workflows keyed by workflow id.
+        jobs (dict): ``(workflow_id, task_name)`` keyed by Slurm job id.
+    """
+
+    def __init__(self, enqueue, use_slurm_dependencies=WORKFLOW_SLURM_DEPENDENCIES):
+        self.enqueue = enqueue
+        self.use_slurm_dependencies = use_slurm_dependencies
+        self.workflows = {}
+        self.jobs = {}
+
+    @staticmethod
+    def build_tasks(task_specs):
+        """Validate task specifications and build the dependency graph, raising ValueError if invalid."""
+        if not isinstance(task_specs, list) or not all(isinstance(spec, dict) for spec in task_specs):
+            raise ValueError("The tasks must be a list of task objects.")
+        tasks = {}
+        for spec in task_specs:
+            name = spec.get('name')
+            if not name or not spec.get('working_dir'):
+                raise ValueError(
+                    "Every task needs a 'name' and a 'working_dir'.")
+            depends_on = spec.get('depends_on', [])
+            if (not isinstance(name, str) or not isinstance(spec['working_dir'], str)
+                    or not isinstance(spec.get('script_name', ''), str)):
+                raise ValueError(f"The name, working_dir and script_name of task {name!r} must be strings.")
+            if not isinstance(depends_on, list) or not all(isinstance(upstream, str) for upstream in depends_on):
+                raise ValueError(f"The depends_on of task {name} must be a list of task names.")
+            if name in tasks:
+                raise ValueError(f"Duplicate task name: {name}")
+            tasks[name] = WorkflowTask(name, spec['working_dir'], spec.get('script_name', 'submit.sh'),
+                                       list(dict.fromkeys(depends_on)))
+
+        for task in tasks.values():
+            for upstream in task.depends_on:
+                if upstream not in tasks:
+                    raise ValueError(
+                        f"Task {task.name} depends on unknown task {upstream}")
+                tasks[upstream].dependents.append(task.name)
+
+        # Kahn's algorithm: every task must be reachable from the roots
+        indegree = {name: len(task.depends_on) for name, task in tasks.items()}
+        ready = deque(name for name, degree in indegree.items() if degree == 0)
+        visited = 0
+        while ready:
+            name = ready.popleft()
+            visited += 1
+            for dependent in tasks[name].dependents:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+        if visited != len(tasks):
+            raise ValueError("The workflow contains a dependency cycle.")
+        return tasks
+
+    def submit(self, task_specs, name=None):
+        """Create a workflow, queue its root tasks and return it."""
+        tasks = self.build_tasks(task_specs)
+        if not tasks:
+            raise ValueError("The workflow has no tasks.")
+        workflow = Workflow(uuid.uuid4().hex[:12], name, tasks)
+        self.workflows[workflow.workflow_id] = workflow
+        for task in tasks.values():
+            if not task.depends_on:
+                self.release(workflow, task)
+        logging.info(
+            f"Workflow {workflow.workflow_id} submitted with {len(tasks)} tasks.")
+        return workflow
+
+    def release(self, workflow, task):
+        """Put a task whose dependencies allow it on the submission queue."""
+        workflow.set_state(task, 'queued')
+        self.enqueue(task.working_dir, task.script_name,
+                     {'workflow_id': workflow.workflow_id, 'task': task.name})
+
+    def sbatch_args(self, options):
+        """Return the extra sbatch arguments of a queued workflow task."""
+        workflow = self.workflows.get(options.get('workflow_id'))
+        if workflow is None or not self.use_slurm_dependencies:
+            return []
+        task = workflow.tasks[options['task']]
+        job_ids = [workflow.tasks[upstream].job_id for upstream in task.depends_on
+                   if workflow.tasks[upstream].state != 'completed']
+        if not job_ids:
+            return []
+        return [f"--dependency=afterok:{':'.join(job_ids)}", "--kill-on-invalid-dep=yes"]
+
+    def task_submitted(self, options, job_id):
+        """Record the job id of a submitted task and release dependents that can be submitted now."""
+        workflow = self.workflows.get(options.get('workflow_id'))
+        if workflow is None:
+            return
+        task = workflow.tasks[options['task']]
+        first_submission = task.job_id is None
+        task.job_id = job_id
+        workflow.set_state(task, 'submitted')
+        self.jobs[job_id] = (workflow.workflow_id, task.name)
+
+        if self.use_slurm_dependencies and first_submission:
+            for name in task.dependents:
+                dependent = workflow.tasks[name]
+                dependent.unsubmitted -= 1
+                if dependent.unsubmitted == 0 and dependent.state == 'waiting':
+                    self.release(workflow, dependent)
+
+    def can_resubmit(self, options):
+        """
+        Check whether the job of a task may be resubmitted after a failure.
+
+        With Slurm dependencies, downstream jobs depend on the original job id, so only
+        tasks without dependents can be resubmitted.
+        """
+        workflow = self.workflows.get(options.get('workflow_id'))
+        if workflow is None or not self.use_slurm_dependencies:
+            return True
+        return not workflow.tasks[options['task']].dependents
+
+    def job_resubmitted(self, job_id):
+        """Forget a failed job whose task was queued again."""
+        entry = self.jobs.pop(job_id, None)
+        if entry is not None:
+            workflow = self.workflows[entry[0]]
+            workflow.set_state(workflow.tasks[entry[1]], 'queued')
+
+    def task_failed(self, options):
+        """Mark a task that could not be submitted as failed."""
+        workflow = self.workflows.get(options.get('workflow_id'))
+        if workflow is not None:
+            self.fail(workflow, workflow.tasks[options['task']])
+
+    def job_finished(self, job_id, state):
+        """
+        Update the workflow of a finished job, given its final accounting state.
+
+        A job in UNKNOWN_STATE may have failed or still be running, so its task is marked
+        'unknown' and its downstream tasks are cancelled rather than released.
+        """
+        entry = self.jobs.pop(job_id, None)
+        if entry is None:
+            return
+        workflow = self.workflows[entry[0]]
+        task = workflow.tasks[entry[1]]
+        if state == UNKNOWN_STATE:
+            logging.warning(
+                f"Outcome of task {task.name} of workflow {workflow.workflow_id} is unknown, "
+                f"cancelling its downstream tasks.")
+            self.fail(workflow, task, 'unknown')
+            return
+        if state not in SUCCESS_STATES:
+            logging.info(
+                f"Task {task.name} of workflow {workflow.workflow_id} ended with {state}.")
+            # Jobs killed by Slurm because an upstream job failed count as cancelled
+            upstream_failed = any(workflow.tasks[upstream].state in ('failed', 'cancelled')
+                                  for upstream in task.depends_on)
+            self.fail(workflow, task, 'cancelled' if upstream_failed else 'failed')
+            return
+
+        workflow.set_state(task, 'completed')
+        for name in task.dependents:
+            dependent = workflow.tasks[name]
+            dependent.unfinished -= 1
+            if dependent.unfinished == 0 and dependent.state == 'waiting':
+                self.release(workflow, dependent)
+
+    def fail(self, workflow, task, state='failed'):
+        """Mark a task as failed and cancel every task downstream of it."""
+        workflow.set_state(task, state)
+        pending = deque(task.dependents)
+        while pending:
+            dependent = workflow.tasks[pending.popleft()]
+            # Submitted dependents are removed by Slurm (--kill-on-invalid-dep) and reported as finished
+            if dependent.state in ('waiting', 'queued'):
+                workflow.set_state(dependent, 'cancelled')
+                pending.extend(dependent.dependents)
+
+    def is_cancelled(self, options):
+        """Check whether a queued workflow task was cancelled in the meantime."""
+        workflow = self.workflows.get(options.get('workflow_id'))
+        return workflow is not None and workflow.tasks[options['task']].state == 'cancelled'
+
+    def get_workflow(self, workflow_id, include_tasks=True):
+        """Return the status of a workflow, or None if it does not exist."""
+        workflow = self.workflows.get(workflow_id)
+        if workflow is None:
+            return None
+        summary = workflow.summary()
+        if include_tasks:
+            summary['tasks'] = [task.to_dict()
+                                for task in workflow.tasks.values()]
+        return summary
@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+from slurm_job_tracker.accounting import SacctReconciler
+
+SACCT_OUTPUT = """101|COMPLETED|0:0|2024-01-01T10:00:00|2024-01-01T11:00:00|3600|
+101.batch|COMPLETED|0:0|2024-01-01T10:00:00|2024-01-01T11:00:00|3600|2048K
+101.0|COMPLETED|0:0|2024-01-01T10:00:05|2024-01-01T10:59:00|3535|1.5G
+102|CANCELLED by 1000|0:15|2024-01-01T10:00:00|2024-01-01T10:30:00|1800|
+103|RUNNING|0:0|2024-01-01T10:00:00|Unknown|7200|
+"""
+
+
+def test_parse_sacct():
+    """Test folding job steps into their job records."""
+    records = SacctReconciler.parse_sacct(SACCT_OUTPUT)
+    assert records["101"] == {
+        'state': 'COMPLETED',
+        'exit_code': '0:0',
+        'start_time': '2024-01-01 10:00:00',
+        'end_time': '2024-01-01 11:00:00',
+        'elapsed': 3600,
+        'max_rss': int(1.5 * 1024 ** 3),
+    }
+    assert records["102"]["state"] == "CANCELLED"
+    assert records["103"]["end_time"] is None
+
+
+@patch("slurm_job_tracker.accounting.subprocess.check_output")
+def test_reconcile_batches_and_caches(mock_check_output):
+    """Test that finished jobs are queried in one call and final records are not queried again."""
+    mock_check_output.return_value = SACCT_OUTPUT.encode()
+    completed_jobs = {job_id: {'end_time': '2024-01-01 12:00:00', 'directory': '/test'}
+                      for job_id in ("101", "102", "103")}
+    reconciler = SacctReconciler(max_attempts=2)
+    reconciler.add(["101", "102", "103"])
+
+    assert sorted(reconciler.reconcile(completed_jobs)) == ["101", "102"]
+    assert mock_check_output.call_count == 1
+    assert "-j" in mock_check_output.call_args[0][0]
+    assert completed_jobs["101"]["end_time"] == '2024-01-01 11:00:00'
+    assert completed_jobs["101"]["directory"] == '/test'
+    assert completed_jobs["102"]["exit_code"] == '0:15'
+
+    # Job 103 is still running in the accounting database and given up after max_attempts
+    reconciler.add(["101"])
+    assert reconciler.reconcile(completed_jobs) == ["103"]
+    assert mock_check_output.call_args[0][0][2] == "103"
+    assert completed_jobs["103"]["end_time"] == '2024-01-01 12:00:00'
+
+
+@patch("slurm_job_tracker.accounting.subprocess.check_output")
+def test_reconciled_ids_are_bounded(mock_check_output):
+    """Test that only the ids of the most recently reconciled jobs are remembered."""
+    mock_check_output.return_value = SACCT_OUTPUT.encode()
+    reconciler = SacctReconciler(reconciled_ids=1)
+    reconciler.add(["101", "102"])
+    reconciler.reconcile({})
+    assert len(reconciler.reconciled) == 1
+
+
+@patch("slurm_job_tracker.accounting.subprocess.check_output", side_effect=FileNotFoundError)
+def test_reconcile_without_sacct(mock_check_output):
+    """Test that jobs are released immediately when sacct is not installed."""
+    reconciler = SacctReconciler()
+    reconciler.add(["101"])
+    assert reconciler.reconcile({"101": {}}) == ["101"]
+    assert not reconciler.available
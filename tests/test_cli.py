@@ -0,0 +1,40 @@
+import subprocess
+import sys
+import time
+
+IMPORT_TIME_BUDGET = 0.15  # Seconds on top of the interpreter start-up
+
+IMPORT_CHECK = """
+import sys
+import slurm_job_tracker.cli
+import slurm_job_tracker.stdlib_client
+print(" ".join(sorted(name for name in sys.modules
+                      if name.split(".")[0] in ("requests", "urllib3", "dotenv", "asyncio", "msgpack")
+                      or name in ("subprocess", "slurm_job_tracker.tracker", "slurm_job_tracker.server"))))
+"""
+
+
+def test_cli_imports_no_heavy_modules():
+    """The client command must not load requests, dotenv or the tracker at start-up."""
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_CHECK], text=True)
+    assert output.split() == []
+
+
+def test_cli_help_does_not_load_dotenv():
+    """Printing the help needs no configuration from the .env file."""
+    check = "import sys\nfrom slurm_job_tracker.cli import main\nsys.argv = ['slurm-client', '--help']\n" \
+            "try:\n    main()\nexcept SystemExit:\n    pass\nassert 'dotenv' not in sys.modules"
+    subprocess.run([sys.executable, "-c", check], check=True, stdout=subprocess.DEVNULL)
+
+
+def test_cli_import_time():
+    """Benchmark the import time of the client command; loading requests alone exceeds the budget."""
+    baseline = min(timed_import("pass") for _ in range(3))
+    elapsed = min(timed_import("import slurm_job_tracker.cli") for _ in range(3))
+    assert elapsed - baseline < IMPORT_TIME_BUDGET
+
+
+def timed_import(statement):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], check=True)
+    return time.perf_counter() - start
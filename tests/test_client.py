@@ -1,12 +1,14 @@
+import asyncio
 import os
 from unittest.mock import patch
 
 import pytest
 
-from slurm_job_tracker.client import SlurmJobTrackerClient
+from slurm_job_tracker.client import AsyncSlurmJobTrackerClient, SlurmJobTrackerClient
+from slurm_job_tracker.commands import ResponseCache
 
 
-@patch("slurm_job_tracker.client.requests.post")
+@patch("slurm_job_tracker.client.requests.Session.post")
 def test_submit_task(mock_post):
     """Test submitting a task to the server."""
     mock_post.return_value.status_code = 200
@@ -21,15 +23,13 @@ def test_submit_task(mock_post):
     assert response == {"status": "Task added to queue"}
     mock_post.assert_called_once_with(
         "http://127.0.0.1:8000",
-        headers={
-            'Content-Type': 'application/json',
-            'Authorization': 'Bearer test_token'
-        },
-        data='{"command": "submit_task", "args": {"working_dir": "/test", "script_name": "script.sh"}}'
+        data='{"command": "submit_task", "args": {"working_dir": "/test", "script_name": "script.sh"}}',
+        timeout=10
     )
+    assert client.session.headers['Authorization'] == 'Bearer test_token'
 
 
-@patch("slurm_job_tracker.client.requests.post")
+@patch("slurm_job_tracker.client.requests.Session.post")
 def test_get_status(mock_post):
     """Test getting the status of running jobs."""
     mock_post.return_value.status_code = 200
@@ -44,15 +44,13 @@ def test_get_status(mock_post):
     assert response == {"running_jobs": ["job1", "job2"]}
     mock_post.assert_called_once_with(
         "http://127.0.0.1:8000",
-        headers={
-            'Content-Type': 'application/json',
-            'Authorization': 'Bearer test_token'
-        },
-        data='{"command": "get_status"}'
+        data='{"command": "get_status"}',
+        timeout=10
     )
+    assert client.session.headers['Authorization'] == 'Bearer test_token'
 
 
-@patch("slurm_job_tracker.client.requests.post")
+@patch("slurm_job_tracker.client.requests.Session.post")
 def test_get_queue(mock_post):
     """Test getting the list of queued tasks."""
     mock_post.return_value.status_code = 200
@@ -78,9 +76,70 @@ def test_get_queue(mock_post):
     }
     mock_post.assert_called_once_with(
         "http://127.0.0.1:8000",
-        headers={
-            'Content-Type': 'application/json',
-            'Authorization': 'Bearer test_token'
-        },
-        data='{"command": "get_queue"}'
+        data='{"command": "get_queue"}',
+        timeout=10
     )
+    assert client.session.headers['Authorization'] == 'Bearer test_token'
+
+
+@patch("slurm_job_tracker.client.requests.Session.post")
+def test_async_send_commands(mock_post):
+    """Test sending several commands concurrently with the async client."""
+    mock_post.return_value.status_code = 200
+    mock_post.return_value.json.return_value = {"status": "OK"}
+
+    async def run():
+        async with AsyncSlurmJobTrackerClient(server_host="127.0.0.1", server_port=8000,
+                                              secret_token="test_token") as client:
+            return await client.send_commands([{"command": "get_info"}] * 5)
+
+    responses = asyncio.run(run())
+
+    assert responses == [{"status": "OK"}] * 5
+    assert mock_post.call_count == 5
+
+
+def test_async_methods_match_sync_client(monkeypatch):
+    """Test that the async client sends the same commands as the synchronous one."""
+    sent = []
+    monkeypatch.setattr(SlurmJobTrackerClient, "send_command",
+                        lambda self, command, timeout=None: sent.append(command) or {"status": "OK"})
+    calls = [("get_node", ("node01",)), ("get_queue", ()), ("get_info", ()), ("get_stats", ()),
+             ("submit_workflow", ([{"name": "a", "working_dir": "/w"}], "wf")), ("get_status", (None, "R"))]
+
+    client = SlurmJobTrackerClient(server_host="127.0.0.1", server_port=8000, secret_token="test_token")
+    for name, args in calls:
+        getattr(client, name)(*args)
+    expected, sent[:] = list(sent), []
+
+    async def run():
+        async with AsyncSlurmJobTrackerClient(server_host="127.0.0.1", server_port=8000,
+                                              secret_token="test_token") as async_client:
+            for name, args in calls:
+                await getattr(async_client, name)(*args)
+
+    asyncio.run(run())
+    assert sent == expected
+
+
+def test_response_cache_is_bounded():
+    """Test that the least recently used responses are evicted."""
+    cache = ResponseCache(size=2)
+    cache.put("a", "1", {})
+    cache.put("b", "2", {})
+    assert cache.get("a") == ("1", {})
+    cache.put("c", "3", {})
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert len(cache) == 2
+
+
+@patch("slurm_job_tracker.client.requests.Session.post")
+def test_tail_output_not_cached(mock_post):
+    """Test that output chunks are not kept in the ETag cache."""
+    mock_post.return_value.status_code = 200
+    mock_post.return_value.headers = {"ETag": '"abc"'}
+    mock_post.return_value.json.return_value = {"status": "Output retrieved"}
+    client = SlurmJobTrackerClient(server_host="127.0.0.1", server_port=8000, secret_token="test_token")
+    client.tail_output("42", offset=0)
+    client.get_info()
+    assert len(client.cache) == 1
@@ -0,0 +1,35 @@
+from slurm_job_tracker.delta import diff_jobs
+
+
+def test_diff_jobs():
+    """Test that only added, changed and removed jobs end up in the delta."""
+    jobs = {
+        "1": {"start_time": "2024-01-01 10:00:00", "nodelist": "node1", "state": "R"},
+        "2": {"start_time": None, "nodelist": "(Priority)", "state": "PD"},
+        "3": {"start_time": "2024-01-01 10:00:00", "nodelist": "node2", "state": "R"},
+        "4": {"directory": "/work", "filename": "slurm-4.out", "state": "PD"},
+    }
+    current_jobs = [
+        ("1", "2024-01-01 10:00:01", "node1", "R"),  # Start time drift only
+        ("2", "2024-01-01 10:05:00", "node3", "R"),
+        ("4", None, "(Priority)", "PD"),  # Submitted by the tracker, first seen in squeue
+        ("5", None, "(Resources)", "PD"),
+    ]
+
+    delta = diff_jobs(jobs, current_jobs)
+    assert delta.added == {"5": (None, "(Resources)", "PD")}
+    assert delta.changed == {"2": ("2024-01-01 10:05:00", "node3", "R"),
+                             "4": (None, "(Priority)", "PD")}
+    assert delta.removed == ["3"]
+    assert delta.summary() == "1 new, 2 changed, 1 finished"
+
+
+def test_diff_jobs_unchanged():
+    """Test that an unchanged poll yields an empty delta."""
+    jobs = {"1": {"start_time": "2024-01-01 10:00:00", "nodelist": "node1", "state": "R"}}
+    delta = diff_jobs(jobs, [("1", "2024-01-01 10:00:05", "node1", "R")])
+    assert not delta
+    assert delta.removed == []
+
+    delta = diff_jobs(jobs, [])
+    assert delta.removed == ["1"]
@@ -0,0 +1,77 @@
+import datetime
+
+from slurm_job_tracker.governor import SubmissionGovernor
+from slurm_job_tracker.stats import JobStatistics
+
+
+def make_stats(runtime_seconds, count, directory="/work"):
+    """Build statistics where every finished job ran for `runtime_seconds`."""
+    end = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    start = end - datetime.timedelta(seconds=runtime_seconds)
+    stats = JobStatistics(min_samples=3)
+    for i in range(count):
+        stats.record(str(i), {
+            'start_time': start.strftime('%Y-%m-%d %H:%M:%S'),
+            'end_time': str(end),
+            'directory': directory,
+        })
+    return stats
+
+
+def test_pending_jobs_counted_separately():
+    """Test that pending and running jobs are distinguished."""
+    governor = SubmissionGovernor(max_jobs=10)
+    jobs = {'1': {'state': 'R'}, '2': {'state': 'PD'}, '3': {'state': 'PD'}}
+    assert governor.count_jobs(jobs) == (1, 2)
+    assert governor.available_slots(jobs, JobStatistics()) == 7
+
+
+def test_pending_depth_target():
+    """Test that the pending depth limits submissions below max_jobs."""
+    governor = SubmissionGovernor(max_jobs=100, max_pending=3)
+    jobs = {'1': {'state': 'R'}, '2': {'state': 'PD'}}
+    assert governor.available_slots(jobs, JobStatistics()) == 2
+
+
+def test_predicted_completions_free_slots():
+    """Test that jobs expected to finish within the lookahead free their slots early."""
+    governor = SubmissionGovernor(max_jobs=2, lookahead=60)
+    stats = make_stats(600, 3)
+    now = datetime.datetime(2024, 1, 2, 12, 0, 0)
+    jobs = {
+        'almost_done': {'state': 'R', 'directory': '/work',
+                        'start_time': (now - datetime.timedelta(seconds=580)).strftime('%Y-%m-%d %H:%M:%S')},
+        'just_started': {'state': 'R', 'directory': '/work',
+                         'start_time': (now - datetime.timedelta(seconds=10)).strftime('%Y-%m-%d %H:%M:%S')},
+    }
+    assert governor.predict_completions(jobs, stats, now) == ['almost_done']
+    assert governor.available_slots(jobs, stats, now) == 1
+
+
+def test_overdue_jobs_and_overcommit():
+    """Test that overdue jobs keep their slots and early submissions stay bounded."""
+    governor = SubmissionGovernor(max_jobs=10, lookahead=60)
+    assert governor.max_overcommit == 1
+    stats = make_stats(600, 3)
+    now = datetime.datetime(2024, 1, 2, 12, 0, 0)
+
+    def started(seconds_ago):
+        return {'state': 'R', 'directory': '/work',
+                'start_time': (now - datetime.timedelta(seconds=seconds_ago)).strftime('%Y-%m-%d %H:%M:%S')}
+
+    overdue = {str(i): started(2000) for i in range(10)}
+    assert governor.predict_completions(overdue, stats, now) == []
+    assert governor.available_slots(overdue, stats, now) == 0
+
+    almost_done = {str(i): started(580) for i in range(10)}
+    assert len(governor.predict_completions(almost_done, stats, now)) == 10
+    assert governor.available_slots(almost_done, stats, now) == 1
+    assert SubmissionGovernor(max_jobs=10, lookahead=60, max_overcommit=5).available_slots(
+        almost_done, stats, now) == 5
+
+
+def test_no_prediction_without_history():
+    """Test that prediction is skipped when there are too few finished jobs."""
+    governor = SubmissionGovernor(max_jobs=1, lookahead=60)
+    jobs = {'1': {'state': 'R', 'start_time': '2024-01-01 00:00:00'}}
+    assert governor.available_slots(jobs, make_stats(600, 2)) == 0
@@ -0,0 +1,45 @@
+import pytest
+
+from slurm_job_tracker.hostlist import NodeIndex, compress_hostlist, expand_hostlist
+
+
+def test_expand_hostlist():
+    """Test expansion of ranges, zero padding, several items and bracket groups."""
+    assert expand_hostlist("node012") == ["node012"]
+    assert expand_hostlist("node[012-014,020]") == ["node012", "node013", "node014", "node020"]
+    assert expand_hostlist("gpu1,node[8-10]") == ["gpu1", "node8", "node9", "node10"]
+    assert expand_hostlist("rack[1-2]-n[01-02]") == ["rack1-n01", "rack1-n02", "rack2-n01", "rack2-n02"]
+    assert expand_hostlist("") == []
+
+
+@pytest.mark.parametrize("hostlist", ["node[1-", "node[a-b]", "node[3-1]", "node]1[", "n[[1]]", 5, ["a"]])
+def test_expand_hostlist_invalid(hostlist):
+    """Test that malformed expressions are rejected."""
+    with pytest.raises(ValueError):
+        expand_hostlist(hostlist)
+
+
+def test_compress_hostlist():
+    """Test that compression merges consecutive numbers and round-trips through expansion."""
+    hosts = ["node014", "node012", "node013", "node020", "gpu1", "login", "node013"]
+    assert compress_hostlist(hosts) == "login,gpu1,node[012-014,020]"
+    assert sorted(expand_hostlist(compress_hostlist(hosts))) == sorted(set(hosts))
+    assert compress_hostlist(["node9", "node10"]) == "node9,node10"
+
+
+def test_node_index():
+    """Test that the index follows jobs as they start, move and finish."""
+    index = NodeIndex()
+    index.update("1", "node[01-02]")
+    index.update("2", "node02")
+    index.update("3", "(Priority)")
+    assert index.get("node02") == {"1", "2"}
+    assert "3" not in index.jobs
+    assert len(index) == 2
+
+    index.update("2", "node03")
+    assert index.lookup("node[02-03]") == {"node02": ["1"], "node03": ["2"]}
+
+    index.remove("1")
+    index.remove("4")
+    assert set(index.nodes) == {"node03"}
@@ -0,0 +1,49 @@
+import pytest
+
+from slurm_job_tracker.output import OutputReader, last_lines
+
+
+@pytest.fixture
+def output_file(tmp_path):
+    path = tmp_path / "slurm-123.out"
+    path.write_bytes(b"".join(f"line {i}\n".encode() for i in range(10000)))
+    return str(path)
+
+
+def test_last_lines():
+    """Test selecting the last lines of a buffer."""
+    assert last_lines(b"a\nb\nc\n", 2) == b"b\nc\n"
+    assert last_lines(b"a\nb\nc", 2) == b"b\nc"
+    assert last_lines(b"a\nb\n", 5) == b"a\nb\n"
+
+
+def test_tail_reads_from_end(output_file):
+    """Test that tail returns the last lines and their offset."""
+    reader = OutputReader()
+    data, offset, size = reader.tail(output_file, 3)
+    assert data == b"line 9997\nline 9998\nline 9999\n"
+    assert offset == size - len(data)
+
+
+def test_tail_only_reads_appended_bytes(output_file, monkeypatch):
+    """Test that a repeated tail of a growing file reuses the cached tail."""
+    reader = OutputReader()
+    reader.tail(output_file, 3)
+    with open(output_file, "ab") as f:
+        f.write(b"line 10000\n")
+
+    monkeypatch.setattr(reader, "read_tail", lambda *args: pytest.fail("file was read from the end again"))
+    data, _, _ = reader.tail(output_file, 2)
+    assert data == b"line 9999\nline 10000\n"
+
+
+def test_read_range(output_file):
+    """Test reading byte ranges, from the end and past the end."""
+    reader = OutputReader(max_bytes=8)
+    data, offset, size = reader.read(output_file, 0, 100)
+    assert data == b"line 0\nl"
+    data, offset, _ = reader.read(output_file, -5)
+    assert data == b"9999\n" and offset == size - 5
+    assert reader.read(output_file, size) == (b"", size, size)
+    assert reader.read(output_file, 0, -1)[0] == b"l"  # Negative lengths are clamped
+    assert reader.read(output_file, 0, 3)[0] == b"lin"
@@ -0,0 +1,63 @@
+import json
+import threading
+import time
+
+from slurm_job_tracker.profiling import TickTracer, sample_stacks
+
+
+def test_tick_tracer(tmp_path):
+    """Test that spans are recorded per tick, bounded and exported when slow."""
+    export_file = tmp_path / "slow.jsonl"
+    tracer = TickTracer(size=2, slow_threshold=0.05, export_file=str(export_file))
+
+    for _ in range(3):
+        with tracer.tick():
+            with tracer.span("squeue"):
+                with tracer.span("parse", rows=3):
+                    pass
+    ticks = tracer.recent()
+    assert [tick["tick"] for tick in ticks] == [2, 3]
+    assert [(span["name"], span["depth"]) for span in ticks[-1]["spans"]] == [("squeue", 0), ("parse", 1)]
+    assert ticks[-1]["spans"][1]["rows"] == 3
+    assert not export_file.exists()
+
+    with tracer.tick():
+        with tracer.span("sbatch"):
+            time.sleep(0.06)
+    exported = [json.loads(line) for line in export_file.read_text().splitlines()]
+    assert [tick["tick"] for tick in exported] == [4]
+    assert exported[0]["spans"][0]["duration"] >= 0.05
+    assert tracer.recent(1) == exported
+
+
+def test_span_outside_tick():
+    """Test that spans outside a tick or on other threads are not recorded."""
+    tracer = TickTracer()
+    with tracer.span("idle"):
+        pass
+    with tracer.tick():
+        thread = threading.Thread(target=lambda: tracer.span("other").__enter__())
+        thread.start()
+        thread.join()
+    assert tracer.recent()[0]["spans"] == []
+
+
+def busy_worker(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_stacks():
+    """Test that the sampling profiler sees the functions of other threads."""
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_worker, args=(stop,), name="busy")
+    thread.start()
+    try:
+        profile = sample_stacks(0.2, interval=0.001)
+    finally:
+        stop.set()
+        thread.join()
+    busy = profile["threads"]["busy"]
+    assert busy["samples"] > 10
+    assert any("busy_worker" in entry["function"] for entry in busy["total"])
+    assert busy["total"][0]["percent"] == 100.0
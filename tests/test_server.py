@@ -1,3 +1,5 @@
+import http.client
+import json
 import os
 import socket
 import threading
@@ -5,7 +7,9 @@ import threading
 import pytest
 import requests
 
-from slurm_job_tracker.server import CommandHandler, ThreadedHTTPServer
+from slurm_job_tracker.client import SlurmJobTrackerClient
+from slurm_job_tracker.server import CommandHandler, ThreadedHTTPServer, UnixHTTPServer
+from slurm_job_tracker.stdlib_client import StdlibSlurmJobTrackerClient
 from slurm_job_tracker.tracker import SlurmJobTracker
 
 
@@ -34,6 +38,17 @@ def server(tracker):
     httpd.shutdown()
 
 
+@pytest.fixture
+def unix_server(tracker, tmp_path):
+    socket_path = str(tmp_path / "tracker.sock")
+    httpd = UnixHTTPServer(socket_path, CommandHandler, tracker)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
 def test_server_submit_task(server):
     """Test the server's task submission API."""
     server_port = server.server_address[1]
@@ -119,6 +134,26 @@ def test_server_get_info(server):
     assert "queued_tasks_count" in response
 
 
+def test_server_get_stats(server):
+    """Test the server's get_stats API."""
+    server_port = server.server_address[1]
+    url = f"http://127.0.0.1:{server_port}"
+    command = {
+        "command": "get_stats"
+    }
+
+    test_token = os.getenv("SLURM_TRACKER_TOKEN", "")
+    headers = {"Authorization": f"Bearer {test_token}"}
+
+    response = requests.post(url, json=command, headers=headers)
+    assert response.status_code == 200
+    response = response.json()
+    assert response["status"] == "Stats retrieved"
+    assert "runtime" in response
+    assert "throughput_per_hour" in response
+    assert "queue_eta_seconds" in response
+
+
 def test_server_unknown_command(server):
     """Test the server's response to an unknown command."""
     server_port = server.server_address[1]
@@ -134,3 +169,139 @@ def test_server_unknown_command(server):
     assert response.status_code == 200
     response = response.json()
     assert response["status"] == "Unknown command"
+
+
+def test_server_keep_alive(server):
+    """Test that several commands can be sent over one persistent connection."""
+    server_port = server.server_address[1]
+    test_token = os.getenv("SLURM_TRACKER_TOKEN", "")
+    headers = {"Authorization": f"Bearer {test_token}",
+               "Content-Type": "application/json"}
+
+    connection = http.client.HTTPConnection("127.0.0.1", server_port)
+    for _ in range(3):
+        connection.request("POST", "/", body=json.dumps({"command": "get_info"}), headers=headers)
+        response = connection.getresponse()
+        assert response.status == 200
+        assert json.loads(response.read())["status"] == "OK"
+    connection.close()
+
+
+def test_unix_socket_server(unix_server):
+    """Test that local clients are served over the Unix socket without a token."""
+    assert os.stat(unix_server.socket_path).st_mode & 0o777 == 0o600
+
+    client = SlurmJobTrackerClient(secret_token="", socket_path=unix_server.socket_path)
+    response = client.get_info()
+    assert response["status"] == "OK"
+    response = client.submit_task("/test/workdir", "submit_test.sh")
+    assert response["status"] == "Task submitted"
+    client.close()
+
+
+def test_server_compression_and_etag(server):
+    """Test gzip compression of large responses and 304 for unchanged results."""
+    server_port = server.server_address[1]
+    url = f"http://127.0.0.1:{server_port}"
+    server.tracker.completed_jobs = {
+        str(i): {"directory": f"/test/workdir/{i}", "filename": f"slurm-{i}.out"} for i in range(100)}
+    command = {"command": "get_status"}
+
+    test_token = os.getenv("SLURM_TRACKER_TOKEN", "")
+    headers = {"Authorization": f"Bearer {test_token}", "Accept-Encoding": "gzip"}
+
+    response = requests.post(url, json=command, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Content-Type"] == "application/json"
+    assert len(response.json()["completed_jobs"]) == 100
+    etag = response.headers["ETag"]
+
+    response = requests.post(url, json=command, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    server.tracker.submit_task("/test/workdir", "submit_test.sh")
+    response = requests.post(url, json={"command": "get_queue"}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+    client = SlurmJobTrackerClient("127.0.0.1", server_port, test_token)
+    first = client.get_status()
+    assert client.get_status() == first
+    assert '{"command": "get_status"}' in client.cache
+    client.close()
+
+
+def test_server_tail_output(server, tmp_path):
+    """Test reading and streaming the output file of a job."""
+    server_port = server.server_address[1]
+    url = f"http://127.0.0.1:{server_port}"
+    (tmp_path / "slurm-42.out").write_text("first\nsecond\nthird\n")
+    server.tracker.completed_jobs["42"] = {"directory": str(tmp_path), "filename": "slurm-42.out"}
+
+    test_token = os.getenv("SLURM_TRACKER_TOKEN", "")
+    headers = {"Authorization": f"Bearer {test_token}"}
+
+    command = {"command": "tail_output", "args": {"job_id": "42", "lines": 2}}
+    response = requests.post(url, json=command, headers=headers).json()
+    assert response["status"] == "Output retrieved"
+    assert response["data"] == "second\nthird\n"
+    assert response["next_offset"] == response["size"]
+
+    command = {"command": "tail_output", "args": {"job_id": "43"}}
+    response = requests.post(url, json=command, headers=headers).json()
+    assert response["status"] == "Output not found"
+
+    for args in ({"lines": "x"}, {"offset": [0]}, {"offset": 0, "length": "all"}):
+        command = {"command": "tail_output", "args": dict(args, job_id="42")}
+        response = requests.post(url, json=command, headers=headers).json()
+        assert response["status"] == "Invalid output request"
+
+    # The job is not running, so the stream ends after the current output
+    response = requests.get(f"{url}/output/42?lines=1", headers=headers)
+    assert response.status_code == 200
+    assert response.text == "third\n"
+
+    response = requests.get(f"{url}/output/42")
+    assert response.status_code == 401
+
+
+def test_stdlib_client(server, unix_server, tmp_path):
+    """Test the http.client based client over TCP and the Unix socket."""
+    server_port = server.server_address[1]
+    test_token = os.getenv("SLURM_TRACKER_TOKEN", "")
+    server.tracker.completed_jobs = {
+        str(i): {"directory": str(tmp_path), "filename": f"slurm-{i}.out"} for i in range(100)}
+    (tmp_path / "slurm-42.out").write_text("first\nsecond\nthird\n")
+
+    with StdlibSlurmJobTrackerClient("127.0.0.1", server_port, test_token, socket_path="") as client:
+        assert client.get_info()["status"] == "OK"
+        first = client.get_status()  # Compressed response
+        assert len(first["completed_jobs"]) == 100
+        assert client.get_status() == first
+        assert '{"command": "get_status"}' in client.cache
+        response = client.submit_task("/test/workdir", "submit_test.sh")
+        assert response["status"] == "Task submitted"
+        assert client.tail_output("42", lines=2)["data"] == "second\nthird\n"
+        assert "".join(client.follow_output("42", lines=1)) == "third\n"
+        assert client.get_info()["status"] == "OK"  # Reconnects after the stream
+
+    client = StdlibSlurmJobTrackerClient("127.0.0.1", server_port, "wrong_token", socket_path="", retries=0)
+    assert client.get_info() is None
+    client.close()
+
+    with StdlibSlurmJobTrackerClient(socket_path=unix_server.socket_path) as client:
+        assert "Authorization" not in client.headers
+        assert client.get_info()["status"] == "OK"
+
+
+def test_server_get_profile(server):
+    """Test that get_profile samples the server threads while the command runs."""
+    server_port = server.server_address[1]
+    test_token = os.getenv("SLURM_TRACKER_TOKEN", "")
+    with StdlibSlurmJobTrackerClient("127.0.0.1", server_port, test_token, socket_path="") as client:
+        response = client.get_profile(duration=0.2)
+    assert response["status"] == "Profile retrieved"
+    assert response["profile"]["duration"] == 0.2
+    assert any("serve_forever" in entry["function"]
+               for thread in response["profile"]["threads"].values() for entry in thread["total"])
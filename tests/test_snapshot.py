@@ -0,0 +1,119 @@
+import os
+import socket
+import threading
+
+import pytest
+
+from slurm_job_tracker.replica import ReplicaTracker
+from slurm_job_tracker.server import CommandHandler, ReplicaHTTPServer
+from slurm_job_tracker.snapshot import COMPLETED, RUNNING, SnapshotReader, SnapshotWriter
+from slurm_job_tracker.stdlib_client import StdlibSlurmJobTrackerClient
+
+META = {"timestamp": "2024-01-01 00:00:00", "info": {"running_jobs": 2}, "queue": {"queue": []}}
+
+
+def make_jobs():
+    running = {"12": {"state": "R", "nodelist": "node[01-02]"}, "3": {"state": "PD", "nodelist": "(Priority)"}}
+    completed = {"7": {"state": "COMPLETED", "directory": "/work", "filename": "slurm-7.out"},
+                 "12": {"state": "FAILED"}}
+    return running, completed
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Test that a published snapshot reads back through the index and in full."""
+    path = str(tmp_path / "snapshot.bin")
+    running, completed = make_jobs()
+    writer = SnapshotWriter(path)
+    assert writer.publish(running, completed, META) == 1
+
+    reader = SnapshotReader(path)
+    assert reader.version == 1
+    assert reader.meta == META
+    assert len(reader) == 4
+    assert reader.get("3") == (RUNNING, running["3"])
+    assert reader.get("7") == (COMPLETED, completed["7"])
+    assert reader.get("12") == (RUNNING, running["12"])
+    assert reader.get("1") is None
+    assert reader.get("99") is None
+    assert reader.jobs(RUNNING) == running
+    assert reader.jobs(COMPLETED) == completed
+    reader.close()
+
+
+def test_snapshot_versions(tmp_path):
+    """Test that versions increase across writers and readers keep the version they mapped."""
+    path = str(tmp_path / "snapshot.bin")
+    running, completed = make_jobs()
+    writer = SnapshotWriter(path)
+    writer.publish(running, completed, META)
+    old = SnapshotReader(path)
+
+    record = running["12"]
+    writer.publish(running, {}, META)
+    assert writer.encoded[(RUNNING, "12")][0] is record  # Unchanged records are not encoded again
+    assert (COMPLETED, "7") not in writer.encoded
+    assert SnapshotWriter(path).publish({}, {}, META) == 3
+    assert not os.path.exists(f"{path}.tmp")
+
+    assert old.version == 1 and old.get("7") is not None
+    new = SnapshotReader(path)
+    assert new.version == 3 and len(new) == 0
+
+
+def test_snapshot_invalid(tmp_path):
+    """Test that files which are not snapshots are rejected."""
+    path = tmp_path / "snapshot.bin"
+    path.write_bytes(b"not a snapshot file at all")
+    with pytest.raises(ValueError):
+        SnapshotReader(str(path))
+
+
+def test_replica(tmp_path):
+    """Test the read-only commands of a replica and its switch to new snapshot versions."""
+    path = str(tmp_path / "snapshot.bin")
+    replica = ReplicaTracker(path)
+    assert replica.handle_command({"command": "get_status"})["status"] == "Snapshot not available"
+
+    running, completed = make_jobs()
+    writer = SnapshotWriter(path)
+    writer.publish(running, completed, META)
+    assert replica.handle_command({"command": "submit_task"})["status"] == "Command not available on a replica"
+    status = replica.handle_command({"command": "get_status"})
+    assert status["running_jobs"] == running and status["completed_jobs"] == completed
+    status = replica.handle_command({"command": "get_status", "args": {"job_id": 7}})
+    assert status["running_jobs"] == {} and status["completed_jobs"] == {"7": completed["7"]}
+    status = replica.handle_command({"command": "get_status", "args": {"nodes": "node02"}})
+    assert list(status["running_jobs"]) == ["12"]
+    status = replica.handle_command({"command": "get_status", "args": {"nodes": "node[1-"}})
+    assert status["status"] == "Invalid hostlist"
+    assert replica.handle_command({"command": "get_queue"})["queue"] == []
+    assert replica.find_output_file("7") == os.path.join("/work", "slurm-7.out")
+    assert replica.find_output_file("12") is None
+
+    writer.publish({}, completed, dict(META, info={"running_jobs": 0}))
+    info = replica.handle_command({"command": "get_info"})
+    assert info["snapshot_version"] == 2 and info["running_jobs"] == 0
+    assert replica.handle_command({"command": "get_status"})["running_jobs"] == {}
+
+
+def test_replica_server(tmp_path):
+    """Test that two replicas share a port and answer clients."""
+    path = str(tmp_path / "snapshot.bin")
+    SnapshotWriter(path).publish(*make_jobs(), META)
+    servers = [ReplicaHTTPServer(("127.0.0.1", 0), CommandHandler, ReplicaTracker(path))]
+    port = servers[0].server_address[1]
+    if hasattr(socket, "SO_REUSEPORT"):
+        servers.append(ReplicaHTTPServer(("127.0.0.1", port), CommandHandler, ReplicaTracker(path)))
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    token = os.getenv("SLURM_TRACKER_TOKEN", "")
+    try:
+        for _ in range(4):
+            with StdlibSlurmJobTrackerClient("127.0.0.1", port, token, socket_path="") as client:
+                assert client.get_status(job_id="12")["running_jobs"] == {"12": make_jobs()[0]["12"]}
+                assert client.get_info()["snapshot_version"] == 1
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
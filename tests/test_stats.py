@@ -0,0 +1,81 @@
+import datetime
+
+import pytest
+
+from slurm_job_tracker.stats import JobStatistics, RuntimeAggregate
+
+
+def make_job(runtime_seconds, end, directory="/work", script_name="submit.sh"):
+    """Build a completed job record that ran for `runtime_seconds` until `end`."""
+    start = end - datetime.timedelta(seconds=runtime_seconds)
+    return {
+        'start_time': start.strftime('%Y-%m-%d %H:%M:%S'),
+        'end_time': str(end),
+        'directory': directory,
+        'script_name': script_name,
+    }
+
+
+def test_runtime_aggregate():
+    """Test the streaming mean, variance and percentiles."""
+    aggregate = RuntimeAggregate()
+    for runtime in [40, 10, 30, 20]:
+        aggregate.add(runtime)
+    assert aggregate.count == 4
+    assert aggregate.mean == pytest.approx(25)
+    assert aggregate.stdev == pytest.approx(12.909944)
+    assert aggregate.percentile(50) == pytest.approx(25)
+    assert aggregate.percentile(100) == 40
+
+
+def test_runtime_aggregate_is_bounded():
+    """Test that percentiles use a bounded window of recent runtimes while the moments cover all."""
+    aggregate = RuntimeAggregate(sample_size=10)
+    for runtime in range(1000):
+        aggregate.add(runtime)
+    assert len(aggregate.samples) == 10
+    assert aggregate.count == 1000
+    assert aggregate.mean == pytest.approx(499.5)
+    assert (aggregate.min, aggregate.max) == (0, 999)
+    assert aggregate.percentile(0) == 990
+
+
+def test_recorded_ids_are_bounded():
+    """Test that only the most recent job ids are remembered."""
+    end = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    stats = JobStatistics(recorded_ids=3)
+    for job_id in "12345":
+        stats.record(job_id, make_job(100, end))
+    assert stats.recorded == {"3", "4", "5"}
+    stats.record("5", make_job(100, end))
+    assert stats.overall.count == 5
+
+
+def test_record_groups_and_skips_duplicates():
+    """Test that jobs are aggregated per directory and script exactly once."""
+    end = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    stats = JobStatistics()
+    stats.record('1', make_job(100, end, directory="/a"))
+    stats.record('1', make_job(100, end, directory="/a"))
+    stats.record('2', make_job(300, end, directory="/b", script_name="run.sh"))
+    stats.record('3', {'start_time': None, 'end_time': str(end)})
+
+    assert stats.overall.count == 2
+    assert stats.by_directory["/a"].count == 1
+    assert stats.by_script["run.sh"].mean == 300
+
+
+def test_queue_eta():
+    """Test the drain estimate from throughput and from runtime waves."""
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    stats = JobStatistics(window=3600, min_samples=1)
+    stats.record('1', make_job(600, now - datetime.timedelta(minutes=10)))
+    stats.record('2', make_job(600, now - datetime.timedelta(minutes=5)))
+
+    assert stats.throughput(now) == 2
+    assert stats.eta(4, max_jobs=10, now=now) == pytest.approx(7200)
+    assert stats.eta(0, max_jobs=10, now=now) == 0
+
+    later = now + datetime.timedelta(hours=2)
+    assert stats.throughput(later) == 0
+    assert stats.eta(15, max_jobs=10, now=later) == pytest.approx(1200)
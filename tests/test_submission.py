@@ -0,0 +1,129 @@
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from slurm_job_tracker.submission import IdempotencyIndex, RetryQueue
+from slurm_job_tracker.tracker import SlurmJobTracker
+
+
+def test_retry_queue_backoff():
+    """Test that retries are delayed exponentially and released in time order."""
+    retries = RetryQueue(base_delay=10, max_delay=25)
+    assert [retries.delay(attempt) for attempt in (1, 2, 3)] == [10, 20, 25]
+
+    retries.push("second", 2, now=0)
+    retries.push("first", 1, now=0)
+    assert retries.pop_due(now=5) == []
+    assert retries.pop_due(now=15) == ["first"]
+    assert retries.pop_due(now=25) == ["second"]
+    assert len(retries) == 0
+
+
+def test_idempotency_index_expiry():
+    """Test that keys are found until they expire."""
+    index = IdempotencyIndex(ttl=60)
+    index.add("key", "/work", "submit.sh")
+    index.update("key", state="submitted", job_id="7")
+    assert index.get("key")["job_id"] == "7"
+    index.records["key"]["created"] -= 61
+    assert index.get("key") is None
+
+
+@pytest.fixture
+def work_dir(tmp_path):
+    (tmp_path / "submit.sh").write_text("#!/bin/bash\n")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def tracker():
+    return SlurmJobTracker()
+
+
+@patch("slurm_job_tracker.tracker.subprocess.run")
+def test_failed_submission_is_retried_without_blocking(mock_run, tracker, work_dir):
+    """Test that a failing sbatch call is delayed while the next task is submitted."""
+    mock_run.side_effect = [
+        subprocess.CalledProcessError(1, "sbatch", stderr="Socket timed out"),
+        subprocess.CompletedProcess("sbatch", 0, stdout="Submitted batch job 101\n"),
+    ]
+    tracker.submit_task(work_dir, "submit.sh")
+    tracker.submit_task(work_dir, "submit.sh")
+
+    assert tracker.process_submission_queue(0, available_slots=2) == 0
+    assert "101" in tracker.job_files
+    assert len(tracker.retries) == 1
+    retry_time, task = tracker.retries.tasks()[0]
+    assert task == (work_dir, "submit.sh", {"attempt": 1})
+
+
+def test_submission_updates_state_under_lock(tracker, work_dir, monkeypatch):
+    """Test that sbatch runs without the lock and the tracked jobs are updated with it."""
+    locked = []
+
+    def run(*args, **kwargs):
+        locked.append(tracker.lock.locked())
+        return subprocess.CompletedProcess("sbatch", 0, stdout="Submitted batch job 101\n")
+
+    def record(job_id, job_info):
+        locked.append(tracker.lock.locked())
+
+    monkeypatch.setattr(subprocess, "run", run)
+    monkeypatch.setattr(tracker.stats, "record", record)
+    original = tracker.submission_succeeded
+    monkeypatch.setattr(tracker, "submission_succeeded",
+                        lambda *args: locked.append(tracker.lock.locked()) or original(*args))
+    monkeypatch.setattr(tracker, "get_current_jobs", lambda: [])
+    monkeypatch.setattr(tracker, "save_current", lambda job_dict: None)
+    monkeypatch.setattr(tracker, "save_history", lambda: None)
+    tracker.snapshots = None
+    tracker.job_files = {}
+    tracker.submit_task(work_dir, "submit.sh")
+    tracker.tick()
+    assert locked == [False, True]
+    assert "101" in tracker.job_files
+
+    # The job disappears from squeue and is finalized without sacct
+    tracker.reconciler.available = False
+    tracker.tick()
+    assert locked == [False, True, True]
+
+
+def test_idempotent_submit(tracker, work_dir):
+    """Test that repeating a submission with the same key does not queue a duplicate."""
+    command = {"command": "submit_task",
+               "args": {"working_dir": work_dir, "script_name": "submit.sh", "idempotency_key": "abc"}}
+    assert tracker.handle_command(command)["status"] == "Task submitted"
+    response = tracker.handle_command(command)
+    assert response["status"] == "Duplicate task"
+    assert response["state"] == "queued"
+    assert tracker.submission_queue.qsize() == 1
+
+
+def test_invalid_submit_keeps_key(tracker, work_dir):
+    """Test that a rejected submission does not register its idempotency key."""
+    args = {"working_dir": work_dir, "script_name": "submit.sh", "idempotency_key": "abc"}
+    response = tracker.handle_command({"command": "submit_task", "args": dict(args, max_resubmits="x")})
+    assert response["status"] == "Invalid task"
+    assert tracker.handle_command({"command": "submit_task", "args": dict(args, max_resubmits=-1)})[
+        "status"] == "Invalid task"
+    assert tracker.submission_queue.qsize() == 0
+
+    assert tracker.handle_command({"command": "submit_task", "args": dict(args, max_resubmits="2")})[
+        "status"] == "Task submitted"
+    assert tracker.submission_queue.get()[2] == {"idempotency_key": "abc", "max_resubmits": 2}
+
+
+def test_resubmit_failed_job(tracker, work_dir):
+    """Test that a job ending in a failure state is queued again while resubmissions are left."""
+    tracker.completed_jobs["101"] = {"directory": work_dir, "script_name": "submit.sh"}
+    tracker.job_options["101"] = {"max_resubmits": 1}
+    assert not tracker.resubmit_failed_job("101", "COMPLETED")
+    assert tracker.resubmit_failed_job("101", "NODE_FAIL")
+    assert tracker.submission_queue.get() == (work_dir, "submit.sh",
+                                              {"max_resubmits": 1, "resubmits": 1})
+
+    tracker.job_options["102"] = {"max_resubmits": 1, "resubmits": 1}
+    tracker.completed_jobs["102"] = {"directory": work_dir, "script_name": "submit.sh"}
+    assert not tracker.resubmit_failed_job("102", "NODE_FAIL")
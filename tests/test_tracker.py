@@ -2,6 +2,8 @@ import pytest
 
 from slurm_job_tracker import SlurmJobTracker
 from slurm_job_tracker.config import MAX_JOBS, TRACKER_INTERVAL
+from slurm_job_tracker.delta import diff_jobs
+from slurm_job_tracker.snapshot import SnapshotWriter
 
 
 @pytest.fixture
@@ -24,3 +26,136 @@ def test_submit_task(tracker):
     assert not tracker.submission_queue.empty()
     task = tracker.submission_queue.get()
     assert task == ("/path/to/workdir", "test_script.sh")
+
+
+def test_submit_workflow(tracker):
+    """Test that a workflow queues its root tasks with their workflow options."""
+    response = tracker.handle_command({
+        "command": "submit_workflow",
+        "args": {"tasks": [
+            {"name": "first", "working_dir": "/path/to/first"},
+            {"name": "second", "working_dir": "/path/to/second", "depends_on": ["first"]},
+        ]},
+    })
+    assert response["status"] == "Workflow submitted"
+    workflow_id = response["workflow_id"]
+
+    queued = tracker.handle_command({"command": "get_queue"})["queued_tasks"]
+    assert queued == [{"working_dir": "/path/to/first", "script_name": "submit.sh",
+                       "workflow_id": workflow_id, "task": "first"}]
+
+    response = tracker.handle_command({"command": "get_workflow", "args": {"workflow_id": workflow_id}})
+    assert response["task_states"] == {"queued": 1, "waiting": 1}
+
+    for tasks in ("first", {"name": "first"}, ["first"], [{"name": "a", "working_dir": "/w", "depends_on": [["x"]]}]):
+        response = tracker.handle_command({"command": "submit_workflow", "args": {"tasks": tasks}})
+        assert response["status"] == "Invalid workflow"
+
+
+def test_apply_delta(tracker):
+    """Test that a squeue delta updates the tracked jobs in place and records finished jobs."""
+    tracker.completed_jobs = {}
+    tracker.job_files = {
+        "1": {"start_time": "2024-01-01 10:00:00", "directory": "/work", "filename": "slurm-1.out",
+              "nodelist": "node1", "state": "R", "script_name": "submit.sh"},
+        "2": {"directory": "/work", "filename": "slurm-2.out", "state": "PD", "script_name": "submit.sh"},
+    }
+    unchanged = tracker.job_files["1"]
+    previous = tracker.job_files["2"]
+
+    delta = diff_jobs(tracker.job_files, [
+        ("2", "2024-01-01 10:05:00", "node2", "R"),
+        ("3", None, "(Priority)", "PD"),
+    ])
+    tracker.apply_delta(delta, "2024-01-01 10:06:00")
+
+    assert set(tracker.job_files) == {"2", "3"}
+    assert tracker.job_files["2"]["nodelist"] == "node2"
+    assert tracker.job_files["2"]["start_time"] == "2024-01-01 10:05:00"
+    assert previous["state"] == "PD"  # Replaced, not modified
+    assert tracker.job_files["3"]["filename"] is None
+    assert tracker.completed_jobs["1"]["end_time"] == "2024-01-01 10:06:00"
+    assert tracker.completed_jobs["1"]["script_name"] == unchanged["script_name"]
+
+
+def test_node_filters(tracker, monkeypatch):
+    """Test the node index through get_status filters and the get_node command."""
+    monkeypatch.setattr(tracker, "find_job_file", lambda job_id: {"directory": None, "filename": None})
+    tracker.job_files = {}
+    tracker.apply_delta(diff_jobs(tracker.job_files, [
+        ("1", "2024-01-01 10:00:00", "node[01-02]", "R"),
+        ("2", "2024-01-01 10:00:00", "node03", "R"),
+        ("3", None, "(Priority)", "PD"),
+    ]), "2024-01-01 10:01:00")
+
+    response = tracker.handle_command({"command": "get_status", "args": {"nodes": "node[02-03]"}})
+    assert list(response["running_jobs"]) == ["1", "2"]
+    assert "completed_jobs" not in response
+    response = tracker.handle_command({"command": "get_status", "args": {"state": "PD"}})
+    assert list(response["running_jobs"]) == ["3"]
+
+    response = tracker.handle_command({"command": "get_node", "args": {"node": "node02"}})
+    assert response["nodes"] == {"node02": ["1"]}
+    assert list(response["jobs"]) == ["1"]
+    for args in ({"node": "node[1-"}, {"node": 5}, {"node": ["a"]}):
+        response = tracker.handle_command({"command": "get_node", "args": args})
+        assert response["status"] == "Invalid hostlist"
+    response = tracker.handle_command({"command": "get_status", "args": {"nodes": 5}})
+    assert response["status"] == "Invalid hostlist"
+
+    # Finished jobs leave the index
+    tracker.apply_delta(diff_jobs(tracker.job_files, [("2", None, "node03", "R")]), "2024-01-01 10:02:00")
+    assert tracker.handle_command({"command": "get_node", "args": {"node": "node01"}})["nodes"] == {"node01": []}
+    assert tracker.get_info()["nodes_in_use_count"] == 1
+
+
+def test_tick_trace(tracker, monkeypatch, tmp_path):
+    """Test that a tick records a span for every phase."""
+    tracker.snapshots = SnapshotWriter(str(tmp_path / "snapshot.bin"))
+    monkeypatch.setattr(tracker, "get_current_jobs", lambda: [("1", None, "(Priority)", "PD")])
+    monkeypatch.setattr(tracker, "save_current", lambda job_dict: None)
+    monkeypatch.setattr(tracker, "save_history", lambda: None)
+    tracker.job_files = {}
+    tracker.tick()
+
+    response = tracker.handle_command({"command": "get_profile", "args": {"limit": 1}})
+    assert response["status"] == "Profile retrieved"
+    assert "profile" not in response
+    spans = [span["name"] for span in response["ticks"][0]["spans"]]
+    assert spans == ["squeue", "diff", "apply_delta", "save_current", "sacct", "finished_jobs", "governor",
+                     "submit", "publish_snapshot"]
+    for args in ({"duration": "x"}, {"duration": "nan"}, {"duration": float("inf")}, {"limit": -1}):
+        response = tracker.handle_command({"command": "get_profile", "args": args})
+        assert response["status"] == "Invalid profile request"
+
+
+def test_snapshot_published_on_change(tracker, monkeypatch, tmp_path):
+    """Test that ticks without changes keep the published snapshot version."""
+    tracker.snapshots = SnapshotWriter(str(tmp_path / "snapshot.bin"))
+    monkeypatch.setattr(tracker, "get_current_jobs", lambda: [("1", None, "(Priority)", "PD")])
+    monkeypatch.setattr(tracker, "save_current", lambda job_dict: None)
+    monkeypatch.setattr(tracker, "save_history", lambda: None)
+    tracker.job_files = {}
+    tracker.tick()
+    tracker.tick()
+    assert tracker.snapshots.version == 1
+
+    tracker.handle_command({"command": "submit_task", "args": {"working_dir": "/missing"}})
+    monkeypatch.setattr(tracker, "process_submission_queue", lambda *args: 1)
+    tracker.tick()
+    assert tracker.snapshots.version == 2
+    # Idle ticks do not build the meta at all
+    monkeypatch.setattr(tracker, "get_queue", lambda: pytest.fail("meta built on an idle tick"))
+    tracker.tick()
+    assert tracker.snapshots.version == 2
+
+
+def test_find_job_file_has_no_side_effects(tracker, monkeypatch, tmp_path):
+    """Test that a found output file is returned without adding a partial tracked job."""
+    output = tmp_path / "slurm-77.out"
+    output.write_text("")
+    monkeypatch.setattr("slurm_job_tracker.tracker.subprocess.check_output",
+                        lambda *args, **kwargs: str(output).encode())
+    tracker.job_files = {}
+    assert tracker.find_job_file("77", str(tmp_path)) == {"directory": str(tmp_path), "filename": "slurm-77.out"}
+    assert tracker.job_files == {}
@@ -0,0 +1,117 @@
+import pytest
+
+from slurm_job_tracker.workflow import UNKNOWN_STATE, WorkflowManager
+
+
+class QueueRecorder:
+    """Collect the tasks a WorkflowManager puts on the submission queue."""
+
+    def __init__(self):
+        self.queued = []
+
+    def __call__(self, working_dir, script_name, options):
+        self.queued.append(options)
+
+    def pop_names(self):
+        names = sorted(options['task'] for options in self.queued)
+        self.queued = []
+        return names
+
+
+def diamond():
+    return [
+        {"name": "prepare", "working_dir": "/w/prepare"},
+        {"name": "left", "working_dir": "/w/left", "depends_on": ["prepare"]},
+        {"name": "right", "working_dir": "/w/right", "depends_on": ["prepare"]},
+        {"name": "merge", "working_dir": "/w/merge", "depends_on": ["left", "right"]},
+    ]
+
+
+@pytest.mark.parametrize("tasks, message", [
+    ([{"name": "a", "working_dir": "/w", "depends_on": ["b"]},
+      {"name": "b", "working_dir": "/w", "depends_on": ["a"]}], "cycle"),
+    ([{"name": "a", "working_dir": "/w", "depends_on": ["missing"]}], "unknown"),
+    ([{"name": "a", "working_dir": "/w"}, {"name": "a", "working_dir": "/w"}], "Duplicate"),
+    ("a", "list of task objects"),
+    ({"name": "a", "working_dir": "/w"}, "list of task objects"),
+    (["a"], "list of task objects"),
+    ([{"name": 1, "working_dir": "/w"}], "strings"),
+    ([{"name": "a", "working_dir": "/w", "depends_on": [["x"]]}], "list of task names"),
+    ([{"name": "a", "working_dir": "/w", "depends_on": "b"}], "list of task names"),
+])
+def test_invalid_workflows(tasks, message):
+    """Test that malformed tasks, cycles, unknown dependencies and duplicate names are rejected."""
+    with pytest.raises(ValueError, match=message):
+        WorkflowManager(QueueRecorder()).submit(tasks)
+
+
+def test_tracker_released_workflow():
+    """Test releasing downstream tasks only after their upstream jobs completed."""
+    queue = QueueRecorder()
+    manager = WorkflowManager(queue, use_slurm_dependencies=False)
+    workflow = manager.submit(diamond())
+    assert queue.pop_names() == ["prepare"]
+
+    manager.task_submitted({'workflow_id': workflow.workflow_id, 'task': 'prepare'}, "1")
+    assert queue.pop_names() == []
+    manager.job_finished("1", "COMPLETED")
+    assert queue.pop_names() == ["left", "right"]
+
+    manager.task_submitted({'workflow_id': workflow.workflow_id, 'task': 'left'}, "2")
+    manager.task_submitted({'workflow_id': workflow.workflow_id, 'task': 'right'}, "3")
+    manager.job_finished("2", "COMPLETED")
+    assert queue.pop_names() == []
+    manager.job_finished("3", "COMPLETED")
+    assert queue.pop_names() == ["merge"]
+    assert manager.sbatch_args({'workflow_id': workflow.workflow_id, 'task': 'merge'}) == []
+
+    manager.task_submitted({'workflow_id': workflow.workflow_id, 'task': 'merge'}, "4")
+    manager.job_finished("4", None)
+    assert workflow.state == 'completed'
+
+
+def test_slurm_dependencies_and_failure():
+    """Test submitting downstream tasks with afterok and cancelling them on failure."""
+    queue = QueueRecorder()
+    manager = WorkflowManager(queue, use_slurm_dependencies=True)
+    workflow = manager.submit(diamond())
+    options = {name: {'workflow_id': workflow.workflow_id, 'task': name} for name in workflow.tasks}
+    queue.pop_names()
+
+    manager.task_submitted(options['prepare'], "1")
+    assert queue.pop_names() == ["left", "right"]
+    assert manager.sbatch_args(options['left']) == ["--dependency=afterok:1", "--kill-on-invalid-dep=yes"]
+
+    manager.task_submitted(options['left'], "2")
+    manager.job_finished("1", "FAILED")
+    assert manager.is_cancelled(options['right'])
+    assert workflow.tasks['merge'].state == 'cancelled'
+
+    # Slurm kills the submitted dependent, which is then reported as cancelled
+    manager.job_finished("2", "CANCELLED")
+    status = manager.get_workflow(workflow.workflow_id)
+    assert status['state'] == 'failed'
+    assert status['task_states'] == {'failed': 1, 'cancelled': 3}
+
+
+def test_unknown_outcome_holds_dependents():
+    """Test that a job without a final accounting record does not release its dependents."""
+    queue = QueueRecorder()
+    manager = WorkflowManager(queue, use_slurm_dependencies=False)
+    workflow = manager.submit(diamond())
+    queue.pop_names()
+
+    manager.task_submitted({'workflow_id': workflow.workflow_id, 'task': 'prepare'}, "1")
+    manager.job_finished("1", UNKNOWN_STATE)
+    assert queue.pop_names() == []
+    status = manager.get_workflow(workflow.workflow_id)
+    assert status['state'] == 'failed'
+    assert status['task_states'] == {'unknown': 1, 'cancelled': 3}
+
+
+def test_large_chain():
+    """Test that long dependency chains are validated without recursion."""
+    tasks = [{"name": "0", "working_dir": "/w"}] + [
+        {"name": str(i), "working_dir": "/w", "depends_on": [str(i - 1)]} for i in range(1, 20000)]
+    workflow = WorkflowManager(QueueRecorder()).submit(tasks)
+    assert workflow.summary()['task_states'] == {'queued': 1, 'waiting': 19999}